@@ -1,72 +1,79 @@
-from docx import Document
-from docx2python import docx2python
-import os
-import io
+from collections import Counter
 
-def analyze_docx(file_path) -> str:
+from document_parser import load_document, parse_uploaded_file
+from models import DocumentAnalysis, ParsedDocument
+
+
+def analyze_docx(document) -> DocumentAnalysis:
+    """Collect the styles, tables, metadata, headers and images of a document
+
+    Everything comes from the cached ParsedDocument, which is built in a
+    single pass over the document archive, so nothing is unzipped again.
+    """
+    if not isinstance(document, ParsedDocument):
+        document = load_document(document) if isinstance(document, str) else parse_uploaded_file(document)
+
+    paragraphs = [para for para in document.paragraphs if para.text.strip()]
+    return DocumentAnalysis(
+        paragraphs=paragraphs,
+        tables=document.tables,
+        style_counts=dict(Counter(para.style or "Default" for para in paragraphs)),
+        properties=document.properties,
+        headers=document.headers,
+        footers=document.footers,
+        images=document.images,
+    )
+
+
+def format_analysis(analysis: DocumentAnalysis) -> str:
+    """Render an analysis as the plain text report shown in the app"""
     analysis_result = []
     
-    doc = Document(file_path)
-    
     analysis_result.append("== PARAGRAPHS AND STYLES ==")
-    for para in doc.paragraphs:
-        if para.text.strip():
-            analysis_result.append(f"Text: {para.text}")
-            analysis_result.append(f"Style: {para.style.name}")
-            analysis_result.append("-" * 50)
+    for para in analysis.paragraphs:
+        analysis_result.append(f"Text: {para.text}")
+        analysis_result.append(f"Style: {para.style}")
+        analysis_result.append("-" * 50)
+    if analysis.style_counts:
+        analysis_result.append("Style usage: " + ", ".join(
+            f"{style} ({count})" for style, count in analysis.style_counts.items()))
     
     analysis_result.append("\n== TABLES ==")
-    for table_idx, table in enumerate(doc.tables):
+    for table_idx, table in enumerate(analysis.tables):
         analysis_result.append(f"Table {table_idx + 1}:")
-        for row in table.rows:
-            row_data = [cell.text.strip() for cell in row.cells]
+        for row_data in table.rows:
             analysis_result.append("\t".join(row_data))
+        for cell in table.cells:
+            if cell.row_span > 1 or cell.col_span > 1:
+                analysis_result.append(
+                    f"Merged cell at row {cell.row + 1}, column {cell.col + 1} "
+                    f"spans {cell.row_span} row(s) x {cell.col_span} column(s): {cell.text}"
+                )
         analysis_result.append("-" * 50)
     
-    try:
-        core_props = doc.core_properties
-        analysis_result.append("\n== METADATA ==")
-        analysis_result.append(f"Author: {core_props.author}")
-        analysis_result.append(f"Created: {core_props.created}")
-        analysis_result.append(f"Modified: {core_props.modified}")
-        analysis_result.append("-" * 50)
-    except Exception as e:
-        analysis_result.append(f"\n== METADATA EXTRACTION ERROR: {str(e)} ==")
+    analysis_result.append("\n== METADATA ==")
+    analysis_result.append(f"Author: {analysis.properties.get('author')}")
+    analysis_result.append(f"Created: {analysis.properties.get('created')}")
+    analysis_result.append(f"Modified: {analysis.properties.get('modified')}")
+    analysis_result.append("-" * 50)
     
-    try:
-        doc_content = docx2python(file_path)
-        
-        analysis_result.append("\n== HEADERS ==")
-        for header in doc_content.header:
-            if header:
-                analysis_result.append(str(header))
-        analysis_result.append("-" * 50)
-        
-        analysis_result.append("\n== FOOTERS ==")
-        for footer in doc_content.footer:
-            if footer:
-                analysis_result.append(str(footer))
-        analysis_result.append("-" * 50)
-    except Exception as e:
-        analysis_result.append(f"\n== HEADERS/FOOTERS EXTRACTION ERROR: {str(e)} ==")
+    analysis_result.append("\n== HEADERS ==")
+    for header in analysis.headers:
+        analysis_result.append(header)
+    analysis_result.append("-" * 50)
     
-    try:
-        analysis_result.append("\n== IMAGES ==")
-        image_count = 0
-        
-        
-        for rel in doc.part.rels:
-            if "image" in doc.part.rels[rel].target_ref:
-                image_part = doc.part.rels[rel].target_part
-                image_filename = os.path.basename(image_part.partname)
-                image_count += 1
-                analysis_result.append(f"Image {image_count}: {image_filename}")
-        
-        if image_count == 0:
-            analysis_result.append("No images found in document")
-        analysis_result.append("-" * 50)
-    except Exception as e:
-        analysis_result.append(f"\n== IMAGE EXTRACTION ERROR: {str(e)} ==")
+    analysis_result.append("\n== FOOTERS ==")
+    for footer in analysis.footers:
+        analysis_result.append(footer)
+    analysis_result.append("-" * 50)
+    
+    analysis_result.append("\n== IMAGES ==")
+    for image_count, image_filename in enumerate(analysis.images, start=1):
+        analysis_result.append(f"Image {image_count}: {image_filename}")
+    
+    if not analysis.images:
+        analysis_result.append("No images found in document")
+    analysis_result.append("-" * 50)
     
     
     return "\n".join(analysis_result)
@@ -74,7 +81,7 @@ def analyze_docx(file_path) -> str:
 
 """
 with st.expander("🔑 Analyzer Formater", expanded=False):
-    file_analyzed = analyze_docx(uploaded_file)
+    file_analyzed = format_analysis(analyze_docx(document))
     st.markdown("#### 🧾 File Content:")
 
     if validation_result['type'] == 'py':
@@ -89,4 +96,4 @@ with st.expander("🔑 Analyzer Formater", expanded=False):
             disabled=True
         )
 st.divider()
-"""
\ No newline at end of file
+"""
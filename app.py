@@ -1,21 +1,20 @@
-import os
 from pathlib import Path
-import re
-import tempfile
 import streamlit as st
 from utils import (
     extract_file_content,
     is_valid_doc, 
     display_screenshots,
 )
-from typer import DocumentRetyper, extract_text_from_docx
+from typer import DocumentRetyper
 from validation import (
     display_error_details
 )
 from pynput.mouse import Controller as MouseController
 import asyncio
 import logging
-from analyzer import analyze_docx
+from analyzer import analyze_docx, format_analysis
+from batch_prepare import find_artifact
+from image_extractor import MEDIA_PREFIXES, extract_images, list_images
 
 
 
@@ -23,6 +22,12 @@ from analyzer import analyze_docx
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def cached_analysis(document_hash: str, _document) -> str:
+    """Formatted format analysis of a parsed document, built once per document hash"""
+    return format_analysis(analyze_docx(_document))
+
 # Page configuration
 st.set_page_config(
     page_title="VClass Typer Automation",
@@ -168,6 +173,7 @@ with tab1:
             st.session_state.file_info = validation_result
             
             try:
+                document = validation_result["document"]
                 file_content = extract_file_content(uploaded_file, validation_result)
 
                 
@@ -195,8 +201,16 @@ with tab1:
                     typing_delay = st.slider("Typing Speed (delay in seconds)", 0.001, 0.1, 0.03, 0.001,
                                             help="Lower values result in faster typing")
 
+                    burst_options = {"Off": None, "Per word": "word", "Per line": "line"}
+                    burst_mode = st.selectbox("Burst Typing", options=list(burst_options.keys()), index=0,
+                                              help="Send a whole word or line at once, then wait once")
+
                     enable_error_correction = st.checkbox("Enable Error Correction", value=True,
                                                         help="Periodically check and correct errors during typing")
+
+                    adaptive_speed = st.checkbox("Adaptive Speed", value=False, disabled=not enable_error_correction,
+                                                 help="Read the editor back at each check and type faster while no keys "
+                                                      "are dropped, up to 4x the selected speed. Type at the end of the editor text")
                 
 
                 col1, col2 = st.columns([1, 2])
@@ -212,24 +226,18 @@ with tab1:
                         status_text.info(message)
                         progress_bar.progress(progress)
                     
-                    async def process_document(doc_path, delay, error_correction):
+                    async def process_document(document, delay, error_correction, burst=None, adaptive=False):
+                        retyper = None
                         try:
-                            retyper = DocumentRetyper(delay=delay)
+                            retyper = DocumentRetyper(delay=delay, burst=burst, adaptive=adaptive)
                             await retyper.async_init()
                             
-                            await retyper.display_document_info(doc_path)
-                            
-                            doc_info = await retyper.display_document_info(doc_path)
+                            doc_stats = await retyper.display_document_info(document)
         
-                            # Extract total character count for progress tracking
-                            char_count_match = re.search(r'(\d+) characters', doc_info)
-                            total_chars = int(char_count_match.group(1)) if char_count_match else 1000
+                            # Total character count for progress tracking
+                            total_chars = doc_stats.characters or 1000
                             
-                            if doc_path.endswith('.docx'):
-                                document_text = extract_text_from_docx(doc_path)
-                            else:
-                                with open(doc_path, 'r') as f:
-                                    document_text = f.read()
+                            document_text = document.text
 
                             for i in range(5, 0, -1):
                                 status_container.info(f"Typing will begin in {i} seconds... Position your cursor where typing should start!")
@@ -248,7 +256,7 @@ with tab1:
                             last_update = 0
 
                             # Create a progress callback function
-                            async def update_typing_progress(chars_typed):
+                            async def update_typing_progress(chars_typed, chars_per_second=0.0):
                                 nonlocal typed_chars, last_update
                                 typed_chars = chars_typed
                                 progress_percent = min(1.0, typed_chars / total_chars)
@@ -256,17 +264,28 @@ with tab1:
                                 # Update only if significant progress has been made (reduces UI updates)
                                 if progress_percent - last_update >= 0.01:  # Update every 1% progress
                                     progress_bar.progress(progress_percent)
-                                    status_text.info(f"Typing: {typed_chars}/{total_chars} characters ({int(progress_percent*100)}%)")
+                                    status_text.info(f"Typing: {typed_chars}/{total_chars} characters ({int(progress_percent*100)}%)"
+                                                     f" at {chars_per_second:.0f} chars/s")
                                     last_update = progress_percent
 
 
 
-                            retyped_content = await retyper.retype_document_with_real_typing(
-                                document_text, 
-                                cursor_position, 
-                                error_correction,
-                                progress_callback=update_typing_progress,
-                            )
+                            # Documents prepared with batch_prepare.py are typed from their stored text and spans
+                            artifact = find_artifact(None, document.hash)
+                            if artifact is not None:
+                                retyped_content = await retyper.retype_prepared(
+                                    artifact,
+                                    cursor_position,
+                                    error_correction,
+                                    progress_callback=update_typing_progress,
+                                )
+                            else:
+                                retyped_content = await retyper.retype_document_with_real_typing(
+                                    document_text, 
+                                    cursor_position, 
+                                    error_correction,
+                                    progress_callback=update_typing_progress,
+                                )
                             progress_bar.progress(1.0)
                             status_text.info(f"Typing: {typed_chars}/{total_chars} characters (100%)")
                             status_container.success("Document has been successfully Retyped !")
@@ -275,20 +294,17 @@ with tab1:
                         except Exception as e:
                             status_container.error(f"Error occurred: {str(e)}")
                             return None
+                        finally:
+                            # Every click creates a retyper; release its keystroke thread and X connections
+                            if retyper is not None:
+                                retyper.close()
                     
                     if uploaded_file is not None:
 
                         st.write(f"File name: {uploaded_file.name}")
                         
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as tmp_file:
-                            tmp_file.write(uploaded_file.getvalue())
-                            temp_path = tmp_file.name
-                        
-                        try:
-                            result = asyncio.run(process_document(temp_path, typing_delay, enable_error_correction))
-                        finally:
-                            if os.path.exists(temp_path):
-                                os.unlink(temp_path)
+                        result = asyncio.run(process_document(document, typing_delay, enable_error_correction,
+                                                              burst_options[burst_mode], adaptive_speed))
                     else:
                         st.error("Please upload a file first.")
                 
@@ -308,24 +324,48 @@ with tab1:
                 st.caption("The Document Formats and Stlyes analyis, ")
                 
                 with st.expander("🔑 Analyzer Formater", expanded=False):
-                    file_analyzed = analyze_docx(uploaded_file)
                     st.markdown("#### 🧾 File Content:")
-
-                    if validation_result['type'] == 'py':
-                        st.code(file_analyzed, language=validation_result['type'])
-                    else:
-                        st.text_area(
-                            label="Document Contains the following Formats as Word Document Provided:",
-                            value=file_analyzed,
-                            height=400,
-                            disabled=True
-                        )
+                    # Expander contents are sent even while collapsed, so the
+                    # analysis is only built and shown once asked for
+                    if st.checkbox("Show format analysis", value=False, key="show_analysis"):
+                        # The analysis only regroups the already parsed document; a
+                        # failure here must not hide the rest of the page
+                        try:
+                            file_analyzed = cached_analysis(document.hash, document)
+                        except Exception as e:
+                            st.error(f"Could not analyze document formats: {str(e)}")
+                        else:
+                            if validation_result['type'] == 'py':
+                                st.code(file_analyzed, language=validation_result['type'])
+                            else:
+                                st.text_area(
+                                    label="Document Contains the following Formats as Word Document Provided:",
+                                    value=file_analyzed,
+                                    height=400,
+                                    disabled=True
+                                )
                 status_container = st.empty()
 
                 st.caption("Please If your document contains images trick the box below to avoid persistent download")
                 st.divider()
                 st.success(f"🚨 Valid {validation_result['type'].upper()} file: {uploaded_file.name} Detected ({validation_result['size']/1024:.1f} KB)")
-                st.checkbox("Images Inside🕶️ ", value=True, help="To avoid image download")
+                images_inside = st.checkbox("Images Inside🕶️ ", value=True, help="To avoid image download")
+
+                if validation_result['type'] in MEDIA_PREFIXES:
+                    if images_inside:
+                        # Listed from the zip directory only; no image bytes are read
+                        image_manifest = list_images(uploaded_file.name, uploaded_file.getvalue())
+                        st.caption(f"🖼️ {len(image_manifest.images)} image(s) inside "
+                                   f"({image_manifest.total_bytes/1024:.1f} KB), not downloaded")
+                    else:
+                        manifests = st.session_state.setdefault('image_manifests', {})
+                        if document.hash not in manifests:
+                            manifests[document.hash] = extract_images(uploaded_file.name, uploaded_file.getvalue())
+                        image_manifest = manifests[document.hash]
+                        st.caption(f"🖼️ Extracted {image_manifest.unique_count} unique image(s) of "
+                                   f"{len(image_manifest.images)} ({image_manifest.total_bytes/1024:.1f} KB)")
+                        if image_manifest.skipped:
+                            st.warning(f"Skipped images over the size limit: {', '.join(image_manifest.skipped)}")
 
             except Exception as e:
                 st.error(f"Error processing document: {str(e)}")
@@ -0,0 +1,150 @@
+import argparse
+import glob
+import gzip
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional
+
+from document_parser import SUPPORTED_TYPES, file_type, formatting_spans, parse_document
+from markup import tokenize_markup
+from models import TypingArtifact
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ARTIFACT_SUFFIX = ".typer.json.gz"
+# Plain text types whose **bold**, __underline__ and _italic_ markers are formatting
+MARKUP_TYPES = ("txt", "md")
+# Leading hex digits of the document hash put in artifact file names
+HASH_PREFIX = 16
+
+
+def artifact_path(output_dir: str, artifact: TypingArtifact) -> str:
+    """Where ``artifact`` is written: its source name plus the start of its hash, so it can be found by hash"""
+    return os.path.join(output_dir, f"{artifact.source}.{artifact.hash[:HASH_PREFIX]}{ARTIFACT_SUFFIX}")
+
+
+def prepare_document(file_path: str) -> TypingArtifact:
+    """Extract, normalize and find the formatting spans of a single document"""
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    # The batch already uses every core, so PDFs are extracted in-process
+    document = parse_document(os.path.basename(file_path), data, workers=1)
+    if document.type in MARKUP_TYPES:
+        # Markers become formatting, as when the text is typed directly
+        text, runs = tokenize_markup(document.text)
+        spans = [run for run in runs if run[2]]
+    else:
+        text, spans = document.text, formatting_spans(document.blocks)
+    return TypingArtifact(
+        source=document.name,
+        hash=document.hash,
+        type=document.type,
+        text=text,
+        spans=spans,
+        stats=document.stats,
+    )
+
+
+def write_artifact(artifact: TypingArtifact, path: str):
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write(artifact.model_dump_json())
+
+
+def load_artifact(path: str) -> TypingArtifact:
+    """Read an artifact written by the batch preparation"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return TypingArtifact.model_validate_json(f.read())
+
+
+def find_artifact(artifact_dir: Optional[str], document_hash: str) -> Optional[TypingArtifact]:
+    """The prepared artifact of the document with ``document_hash``, if ``artifact_dir`` has one
+
+    ``artifact_dir`` defaults to the ``TYPER_ARTIFACT_DIR`` environment
+    variable; without either nothing is looked up.
+    """
+    artifact_dir = artifact_dir or os.environ.get("TYPER_ARTIFACT_DIR")
+    if not artifact_dir or not os.path.isdir(artifact_dir):
+        return None
+    pattern = os.path.join(glob.escape(artifact_dir), f"*.{document_hash[:HASH_PREFIX]}{ARTIFACT_SUFFIX}")
+    for path in glob.glob(pattern):
+        try:
+            artifact = load_artifact(path)
+        except Exception as e:
+            logger.warning(f"Could not read artifact {path}: {str(e)}")
+            continue
+        if artifact.hash == document_hash:
+            return artifact
+    return None
+
+
+def _prepare_and_write(file_path: str, output_dir: str) -> str:
+    artifact = prepare_document(file_path)
+    path = artifact_path(output_dir, artifact)
+    write_artifact(artifact, path)
+    return path
+
+
+def find_documents(input_dir: str) -> List[str]:
+    """Supported documents directly inside ``input_dir``, sorted by name"""
+    return sorted(
+        os.path.join(input_dir, name) for name in os.listdir(input_dir)
+        if os.path.isfile(os.path.join(input_dir, name)) and file_type(name) in SUPPORTED_TYPES
+    )
+
+
+def prepare_folder(input_dir: str, output_dir: str, workers: Optional[int] = None) -> dict:
+    """Prepare every supported document of a folder on a process pool
+
+    Returns a mapping of source path to artifact path, or to the error
+    message for documents that could not be prepared.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    documents = find_documents(input_dir)
+    results = {}
+    if not documents:
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = {executor.submit(_prepare_and_write, path, output_dir): path for path in documents}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path] = future.result()
+                logger.info(f"Prepared {path}")
+            except Exception as e:
+                results[path] = f"Error: {str(e)}"
+                logger.error(f"Failed to prepare {path}: {str(e)}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Turn a folder of .docx/.odt/.pdf/.txt documents into typing-ready artifacts"
+    )
+    parser.add_argument("input_dir", help="Folder containing the documents")
+    parser.add_argument("-o", "--output-dir", help="Where to write artifacts (default: INPUT_DIR/prepared)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input_dir):
+        print(f"Error: {args.input_dir} is not a directory.")
+        return 1
+
+    output_dir = args.output_dir or os.path.join(args.input_dir, "prepared")
+    start = time.perf_counter()
+    results = prepare_folder(args.input_dir, output_dir, args.workers)
+    failed = [path for path, result in results.items() if result.startswith("Error:")]
+
+    print(f"Prepared {len(results) - len(failed)}/{len(results)} documents "
+          f"in {time.perf_counter() - start:.1f}s -> {output_dir}")
+    for path in failed:
+        print(f"  {path}: {results[path]}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
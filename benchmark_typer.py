@@ -0,0 +1,235 @@
+import argparse
+import asyncio
+import contextlib
+import enum
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+import types
+from array import array
+from typing import Dict, List
+
+METHODS = ("type_text", "type_with_verification", "type_with_formatting")
+SIZES = {"1K": 1024, "10K": 10 * 1024, "100K": 100 * 1024, "1M": 1024 * 1024}
+
+_WORDS = (
+    "the document retyper keeps every paragraph heading table and list in order while the editor "
+    "receives each keystroke at the requested pace so long reports contracts theses and manuals "
+    "come out exactly as written including café naïve résumé — “quoted” text"
+).split()
+
+
+class FakeKeyboard:
+    """Stands in for pynput's keyboard Controller and records when each key went down"""
+
+    def __init__(self):
+        self.presses = array('d')
+        self.count = 0
+
+    def press(self, key):
+        self.presses.append(time.perf_counter())
+
+    def release(self, key):
+        self.count += 1
+
+    @contextlib.contextmanager
+    def pressed(self, *keys):
+        yield
+
+    def type(self, text):
+        for char in text:
+            self.press(char)
+            self.release(char)
+
+
+class FakeMouse:
+    """Stands in for pynput's mouse Controller"""
+
+    def __init__(self):
+        self.position = (0, 0)
+        self.clicks = 0
+
+    def click(self, button, count=1):
+        self.clicks += count
+
+    def press(self, button):
+        pass
+
+    def release(self, button):
+        pass
+
+
+class FakeLanguageTool:
+    """Stands in for language_tool_python.LanguageTool without starting its Java server"""
+
+    def __init__(self, language):
+        pass
+
+    def check(self, text):
+        return []
+
+
+def _install_offline_modules():
+    """Register fake pynput, keyboard and language_tool_python modules before typer is imported
+
+    The real ones connect to the X display or start LanguageTool as soon as
+    they are imported, which fails or takes seconds on a headless machine.
+    """
+    key = enum.Enum("Key", "alt backspace ctrl delete down end enter esc home left right shift space tab up")
+    button = enum.Enum("Button", "left middle right")
+    fakes = {
+        "pynput": {},
+        "pynput.keyboard": {"Key": key, "Controller": FakeKeyboard},
+        "pynput.mouse": {"Button": button, "Controller": FakeMouse},
+        "keyboard": {"write": lambda text: None},
+        "language_tool_python": {"LanguageTool": FakeLanguageTool},
+    }
+    for name, attributes in fakes.items():
+        module = types.ModuleType(name)
+        module.__dict__.update(attributes)
+        sys.modules[name] = module
+    sys.modules["pynput"].keyboard = sys.modules["pynput.keyboard"]
+    sys.modules["pynput"].mouse = sys.modules["pynput.mouse"]
+
+
+_install_offline_modules()
+
+import keystroke_plan  # noqa: E402
+from typer import RealKeyboardTyper  # noqa: E402
+
+
+def synthetic_document(size: int, formatted: bool = False, seed: int = 0) -> str:
+    """Prose of about ``size`` characters; ``formatted`` wraps some words in **, __ or _ markup"""
+    rng = random.Random(seed)
+    paragraphs = []
+    length = 0
+    while length < size:
+        sentences = []
+        for _ in range(rng.randint(2, 6)):
+            words = [rng.choice(_WORDS) for _ in range(rng.randint(6, 18))]
+            if formatted:
+                for i in range(0, len(words), 12):
+                    marker = rng.choice(("**", "__", "_"))
+                    words[i] = f"{marker}{words[i]}{marker}"
+            sentences.append(" ".join(words).capitalize() + rng.choice(".!?"))
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+    return "\n\n".join(paragraphs)[:size]
+
+
+def make_typer(delay: float) -> RealKeyboardTyper:
+    """A RealKeyboardTyper wired to the fake controllers, with grammar checks and speed control off"""
+    engine = RealKeyboardTyper(delay=delay, backend="pynput", adaptive=False, jitter=0.0)
+    engine.grammar_checker.language_tool = None
+    return engine
+
+
+async def _drive(engine: RealKeyboardTyper, method: str, text: str):
+    if method == "type_text":
+        await engine.type_text(text)
+    elif method == "type_with_verification":
+        await engine.type_with_verification(text, error_correction=True)
+    else:
+        await engine.type_with_formatting(text)
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def run_case(method: str, size: int, delay: float, memory: bool) -> Dict[str, float]:
+    """Type one synthetic document with one method and measure the engine"""
+    text = synthetic_document(size, formatted=method == "type_with_formatting")
+    engine = make_typer(delay)
+
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    asyncio.run(_drive(engine, method, text))
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    engine.close()
+
+    presses = engine.keyboard.presses
+    chars = max(1, engine.rate.chars)
+    # Rate over the keystrokes themselves, leaving out the initial focus click
+    typing = presses[-1] - presses[0] if len(presses) > 1 else wall
+    # Lateness of every key against the configured delay, in milliseconds
+    lateness = sorted((presses[i] - presses[i - 1] - delay) * 1000 for i in range(1, len(presses)))
+
+    result = {
+        "method": method,
+        "size": size,
+        "chars": engine.rate.chars,
+        "seconds": wall,
+        "chars_per_second": chars / typing if typing else 0.0,
+        "cpu_us_per_char": cpu / chars * 1e6,
+        "jitter_p50_ms": _percentile(lateness, 0.50),
+        "jitter_p90_ms": _percentile(lateness, 0.90),
+        "jitter_p99_ms": _percentile(lateness, 0.99),
+        "jitter_mean_ms": statistics.fmean(lateness) if lateness else 0.0,
+        "peak_mb": None,
+    }
+
+    if memory:
+        # A second, traced run: tracemalloc slows typing down too much to time it
+        engine = make_typer(delay)
+        tracemalloc.start()
+        asyncio.run(_drive(engine, method, text))
+        result["peak_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+        engine.close()
+
+    return result
+
+
+def format_results(results: List[Dict[str, float]]) -> str:
+    header = (f"{'method':<24}{'size':>9}{'chars/s':>12}{'cpu us/ch':>11}"
+              f"{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'peak MB':>9}")
+    lines = [header, "-" * len(header)]
+    for r in results:
+        peak = f"{r['peak_mb']:.1f}" if r["peak_mb"] is not None else "-"
+        lines.append(f"{r['method']:<24}{r['size']:>9}{r['chars_per_second']:>12.0f}{r['cpu_us_per_char']:>11.1f}"
+                     f"{r['jitter_p50_ms']:>9.3f}{r['jitter_p90_ms']:>9.3f}{r['jitter_p99_ms']:>9.3f}{peak:>9}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure RealKeyboardTyper throughput offline, with fake keyboard and mouse controllers"
+    )
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), choices=list(SIZES),
+                        help="Synthetic document sizes (default: all)")
+    parser.add_argument("--methods", nargs="+", default=list(METHODS), choices=METHODS,
+                        help="Typing methods to drive (default: all)")
+    parser.add_argument("--delay", type=float, default=0.0,
+                        help="Typing delay in seconds; 0 measures pure engine overhead (default: 0)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced run that measures peak memory")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    # Formatting toggles normally wait for the editor; offline they only cost the typing delay
+    keystroke_plan.TOGGLE_DELAY = args.delay
+
+    results = []
+    for method in args.methods:
+        for size in args.sizes:
+            result = run_case(method, SIZES[size], args.delay, not args.no_memory)
+            results.append(result)
+            print(f"{method} {size}: {result['chars_per_second']:.0f} chars/s", file=sys.stderr)
+
+    print(format_results(results))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
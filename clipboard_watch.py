@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Optional
+
+import pyperclip
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Longest wait for the editor to take the clipboard after a copy shortcut
+CLIPBOARD_TIMEOUT = 5.0
+# Clipboard polling period when selection events are not available
+CLIPBOARD_POLL = 0.02
+
+
+class SelectionWatch:
+    """Notifications of CLIPBOARD ownership changes, through the XFIXES extension
+
+    Every copy makes the copying application call XSetSelectionOwner, which
+    XFIXES reports as a SetSelectionOwnerNotify event; waiting for that
+    event returns as soon as the new content is there to be read.
+    """
+
+    def __init__(self, display):
+        from Xlib.ext import xfixes
+        self.display = display
+        display.xfixes_query_version()
+        display.xfixes_select_selection_input(
+            display.screen().root, display.get_atom("CLIPBOARD"), xfixes.XFixesSetSelectionOwnerNotifyMask
+        )
+        display.flush()
+
+    @classmethod
+    def open(cls) -> Optional["SelectionWatch"]:
+        """A watch on $DISPLAY, or None when there is no X display with XFIXES"""
+        if not os.environ.get("DISPLAY"):
+            return None
+        try:
+            from Xlib.display import Display
+            display = Display()
+        except Exception:
+            return None
+        try:
+            if display.has_extension("XFIXES"):
+                return cls(display)
+        except Exception:
+            pass
+        display.close()
+        return None
+
+    def _owner_changed(self) -> bool:
+        """Read the queued events and tell whether one of them was an ownership change"""
+        changed = False
+        while self.display.pending_events():
+            event = self.display.next_event()
+            if (event.type, getattr(event, "sub_code", None)) == self.display.extension_event.SetSelectionOwnerNotify:
+                changed = True
+        return changed
+
+    def drain(self):
+        """Forget ownership changes that happened before now"""
+        self._owner_changed()
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait until the clipboard changes owner; False after ``timeout`` seconds"""
+        loop = asyncio.get_running_loop()
+        changed = loop.create_future()
+
+        def on_readable():
+            if self._owner_changed() and not changed.done():
+                changed.set_result(True)
+
+        fd = self.display.fileno()
+        loop.add_reader(fd, on_readable)
+        try:
+            # Events that arrived before the reader was installed are already buffered
+            on_readable()
+            await asyncio.wait_for(changed, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            loop.remove_reader(fd)
+
+    def close(self):
+        self.display.close()
+
+
+class ClipboardReader:
+    """Read what a copy shortcut put on the clipboard as soon as it lands
+
+    With XFIXES the reader wakes on the editor taking the clipboard;
+    elsewhere it clears the clipboard first and polls it every
+    CLIPBOARD_POLL seconds. Either way the wait ends after ``timeout``.
+    """
+
+    def __init__(self, timeout: float = CLIPBOARD_TIMEOUT):
+        self.timeout = timeout
+        self._watch = SelectionWatch.open()
+        if self._watch is None:
+            logger.info("Clipboard ownership events unavailable, polling the clipboard instead")
+
+    async def capture(self, copy: Callable[[], Awaitable[None]]) -> str:
+        """Run ``copy`` and return the clipboard content it produced ("" on timeout)"""
+        if self._watch is not None:
+            self._watch.drain()
+            await copy()
+            if await self._watch.wait(self.timeout):
+                return pyperclip.paste()
+            return ""
+
+        pyperclip.copy('')
+        await copy()
+        deadline = time.monotonic() + self.timeout
+        while True:
+            content = pyperclip.paste()
+            if content or time.monotonic() >= deadline:
+                return content
+            await asyncio.sleep(CLIPBOARD_POLL)
+
+    def close(self):
+        if self._watch is not None:
+            self._watch.close()
+            self._watch = None
@@ -0,0 +1,263 @@
+from bisect import bisect_left
+from collections import Counter
+from math import isqrt
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Diagonal steps one diff may spend over all its bisections; once they are
+# used up the rest of the texts is reported as one replacement, which bounds
+# the worst case (two unrelated texts) to a fraction of a second instead of O(N * D)
+MAX_EDIT_COST = 250_000
+
+Opcode = Tuple[str, int, int, int, int]
+
+
+class _Budget:
+    """Diagonal steps left for one diff, shared by every bisection it runs"""
+
+    def __init__(self, steps: int = MAX_EDIT_COST):
+        self.steps = steps
+
+
+def _snake(a: Sequence, b: Sequence, x: int, y: int, n: int, m: int) -> int:
+    """Follow equal elements from (x, y) and return where they stop
+
+    Equal runs are compared as growing slices, so long matches cost a few
+    C-level comparisons instead of one Python step per element.
+    """
+    size = 1
+    while x < n and y < m:
+        size = min(size, n - x, m - y)
+        if a[x:x + size] == b[y:y + size]:
+            x += size
+            y += size
+            size *= 2
+        elif size == 1:
+            break
+        else:
+            size //= 2
+    return x
+
+
+def _common_prefix(a: Sequence, b: Sequence) -> int:
+    return _snake(a, b, 0, 0, len(a), len(b))
+
+
+def _common_suffix(a: Sequence, b: Sequence, limit: int) -> int:
+    low, high = 0, limit
+    # Binary search on slice equality; suffixes are compared from the end
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:] == b[len(b) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _bisect(a: Sequence, b: Sequence, budget: _Budget):
+    """Find where the forward and backward shortest edit paths meet (Myers' middle snake)
+
+    Only two vectors of furthest-reaching points are kept, so memory is
+    linear in the input. Every diagonal step is charged to ``budget``;
+    returns the split point, or None once the budget is used up.
+    """
+    n, m = len(a), len(b)
+    # Reaching edit cost d takes about d * d steps
+    max_d = min((n + m + 1) // 2, isqrt(budget.steps) + 1)
+    offset = max_d + 1
+    forward = [-1] * (2 * offset + 1)
+    backward = [-1] * (2 * offset + 1)
+    forward[offset + 1] = 0
+    backward[offset + 1] = 0
+    delta = n - m
+    # With an odd delta the paths meet on a forward step, otherwise on a backward one
+    front = delta % 2 != 0
+    reversed_a, reversed_b = a[::-1], b[::-1]
+
+    for d in range(max_d):
+        budget.steps -= 2 * (d + 1)
+        if budget.steps < 0:
+            budget.steps = 0
+            return None
+        for k in range(-d, d + 1, 2):
+            index = offset + k
+            if k == -d or (k != d and forward[index - 1] < forward[index + 1]):
+                x = forward[index + 1]
+            else:
+                x = forward[index - 1] + 1
+            x = _snake(a, b, x, x - k, n, m)
+            forward[index] = x
+            if front:
+                other = offset + delta - k
+                if 0 <= other < len(backward) and backward[other] != -1 and x >= n - backward[other]:
+                    return x, x - k
+
+        for k in range(-d, d + 1, 2):
+            index = offset + k
+            if k == -d or (k != d and backward[index - 1] < backward[index + 1]):
+                x = backward[index + 1]
+            else:
+                x = backward[index - 1] + 1
+            x = _snake(reversed_a, reversed_b, x, x - k, n, m)
+            backward[index] = x
+            if not front:
+                other = offset + delta - k
+                if 0 <= other < len(forward) and forward[other] != -1 and forward[other] >= n - x:
+                    split = forward[other]
+                    return split, split - (delta - k)
+    return None
+
+
+def myers_opcodes(a: Sequence, b: Sequence, budget: Optional[_Budget] = None) -> List[Opcode]:
+    """Non-equal (tag, a_start, a_end, b_start, b_end) regions of a minimal diff of two sequences
+
+    Tags are ``delete``, ``insert`` and ``replace`` as in difflib; equal
+    regions are left out. Works on strings and on lists of hashables. When
+    ``budget`` runs out, everything not diffed yet becomes one replacement.
+    """
+    budget = _Budget() if budget is None else budget
+    operations: List[Opcode] = []
+    # Regions still to diff, as (a_start, a_end, b_start, b_end); popped last-first to keep order
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        a0, a1, b0, b1 = stack.pop()
+        if not budget.steps and stack:
+            # The regions left are contiguous and end where the whole diff does
+            a1, b1 = stack[0][1], stack[0][3]
+            stack = []
+        sub_a, sub_b = a[a0:a1], b[b0:b1]
+        prefix = _common_prefix(sub_a, sub_b)
+        suffix = _common_suffix(sub_a, sub_b, min(len(sub_a), len(sub_b)) - prefix)
+        a0, a1 = a0 + prefix, a1 - suffix
+        b0, b1 = b0 + prefix, b1 - suffix
+        if a0 == a1 and b0 == b1:
+            continue
+        if a0 == a1:
+            operations.append(("insert", a0, a0, b0, b1))
+            continue
+        if b0 == b1:
+            operations.append(("delete", a0, a1, b0, b0))
+            continue
+
+        split = _bisect(a[a0:a1], b[b0:b1], budget) if budget.steps else None
+        if split is None or split in ((0, 0), (a1 - a0, b1 - b0)):
+            operations.append(("replace", a0, a1, b0, b1))
+            continue
+        x, y = split
+        stack.append((a0 + x, a1, b0 + y, b1))
+        stack.append((a0, a0 + x, b0, b0 + y))
+
+    return _merge(operations)
+
+
+def _merge(operations: List[Opcode]) -> List[Opcode]:
+    """Join touching operations, turning a delete next to an insert into a replace"""
+    merged: List[Opcode] = []
+    for tag, a0, a1, b0, b1 in operations:
+        if merged and merged[-1][2] == a0 and merged[-1][4] == b0:
+            _, p0, _, q0, _ = merged.pop()
+            a0, b0 = p0, q0
+            tag = "replace" if a1 > a0 and b1 > b0 else ("delete" if a1 > a0 else "insert")
+        merged.append((tag, a0, a1, b0, b1))
+    return merged
+
+
+def diff_opcodes(original: str, typed: str) -> List[Opcode]:
+    """Character-level non-equal regions between two texts, aligned across insertions and deletions
+
+    The texts are diffed line by line first, so a megabyte-sized readback
+    with a few mistakes only runs the character-level diff inside the few
+    lines that changed. Line changes closer together than their own size
+    are refined as one region, so a line deleted on one side of a short
+    equal line and retyped on the other still matches character by
+    character.
+    """
+    prefix = _common_prefix(original, typed)
+    suffix = _common_suffix(original, typed, min(len(original), len(typed)) - prefix)
+    original_middle = original[prefix:len(original) - suffix]
+    typed_middle = typed[prefix:len(typed) - suffix]
+    if not original_middle and not typed_middle:
+        return []
+
+    ids: Dict[str, int] = {}
+    original_lines = original_middle.splitlines(keepends=True)
+    typed_lines = typed_middle.splitlines(keepends=True)
+    original_ids = [ids.setdefault(line, len(ids)) for line in original_lines]
+    typed_ids = [ids.setdefault(line, len(ids)) for line in typed_lines]
+
+    original_offsets = _offsets(original_lines, prefix)
+    typed_offsets = _offsets(typed_lines, prefix)
+
+    # The line and character diffs draw on the same budget
+    budget = _Budget()
+    regions: List[Opcode] = []
+    last_size = 0
+    for tag, a0, a1, b0, b1 in _anchored_opcodes(original_ids, typed_ids, budget):
+        i0, i1 = original_offsets[a0], original_offsets[a1]
+        j0, j1 = typed_offsets[b0], typed_offsets[b1]
+        size = i1 - i0 + j1 - j0
+        if regions and i0 - regions[-1][2] < max(size, last_size):
+            _, p0, _, q0, _ = regions.pop()
+            tag, i0, j0 = "replace", p0, q0
+        regions.append((tag, i0, i1, j0, j1))
+        last_size = size
+
+    operations: List[Opcode] = []
+    for tag, i0, i1, j0, j1 in regions:
+        if tag != "replace":
+            operations.append((tag, i0, i1, j0, j1))
+            continue
+        for char_tag, c0, c1, d0, d1 in myers_opcodes(original[i0:i1], typed[j0:j1], budget):
+            operations.append((char_tag, i0 + c0, i0 + c1, j0 + d0, j0 + d1))
+    return _merge(operations)
+
+
+def _anchored_opcodes(a: List[int], b: List[int], budget: _Budget) -> List[Opcode]:
+    """myers_opcodes, run separately between lines that occur exactly once in both texts
+
+    Unique lines kept in the same order are matched up front (patience
+    diff), which keeps every Myers region small even when mistakes are
+    spread over thousands of lines.
+    """
+    counts_a, counts_b = Counter(a), Counter(b)
+    unique = {line for line, count in counts_a.items() if count == 1 and counts_b.get(line) == 1}
+    positions = {line: j for j, line in enumerate(b) if line in unique}
+    anchors = _longest_increasing([(i, positions[line]) for i, line in enumerate(a) if line in unique])
+
+    operations: List[Opcode] = []
+    a0 = b0 = 0
+    for i, j in anchors + [(len(a), len(b))]:
+        for tag, p0, p1, q0, q1 in myers_opcodes(a[a0:i], b[b0:j], budget):
+            operations.append((tag, a0 + p0, a0 + p1, b0 + q0, b0 + q1))
+        a0, b0 = i + 1, j + 1
+    return operations
+
+
+def _longest_increasing(pairs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Longest run of ``pairs`` (sorted by first item) whose second items increase"""
+    tails: List[int] = []
+    tail_index: List[int] = []
+    previous = [-1] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        slot = bisect_left(tails, j)
+        if slot:
+            previous[index] = tail_index[slot - 1]
+        if slot == len(tails):
+            tails.append(j)
+            tail_index.append(index)
+        else:
+            tails[slot] = j
+            tail_index[slot] = index
+    result = []
+    index = tail_index[-1] if tail_index else -1
+    while index != -1:
+        result.append(pairs[index])
+        index = previous[index]
+    return result[::-1]
+
+
+def _offsets(lines: List[str], start: int) -> List[int]:
+    offsets = [start]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+    return offsets
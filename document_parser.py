@@ -0,0 +1,243 @@
+import codecs
+import hashlib
+import io
+import logging
+import mimetypes
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import chardet
+
+import docx_reader
+import odt_reader
+from models import DocumentBlock, DocumentStats, ParsedDocument, TextRun
+from pdf_reader import iter_pdf_blocks
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DOCX_TYPES = ("docx",)
+ODT_TYPES = ("odt",)
+PDF_TYPES = ("pdf",)
+TEXT_TYPES = ("txt", "py", "md")
+SUPPORTED_TYPES = DOCX_TYPES + ODT_TYPES + PDF_TYPES + TEXT_TYPES
+
+# Word processor packages and the reader module that understands each one.
+# Both readers expose the same functions and produce the same blocks.
+_PACKAGE_READERS = {"docx": docx_reader, "odt": odt_reader}
+
+# Checked in order, so the UTF-32 marks win over the UTF-16 ones they start with
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+_CHARDET_SAMPLE_SIZE = 64 * 1024
+
+FORMAT_BOLD = 1
+FORMAT_ITALIC = 2
+FORMAT_UNDERLINE = 4
+
+# Parsed documents are kept per content hash so every Streamlit rerun and
+# every stage of a run reuses the same parse instead of unzipping again.
+_CACHE_SIZE = 8
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def content_hash(data: bytes) -> str:
+    """Return the SHA-256 hex digest used as the cache key"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_type(file_name: str) -> str:
+    """Return the lowercase extension of a file name without the dot"""
+    return file_name.rsplit('.', 1)[-1].lower() if '.' in file_name else ""
+
+
+def block_to_text(block: DocumentBlock) -> str:
+    """Render a block the way it should be typed"""
+    if block.kind == "table":
+        return "\n".join(" | ".join(row) for row in block.rows)
+    if block.kind == "heading":
+        return '#' * block.level + ' ' + block.text
+    return block.text
+
+
+def blocks_to_text(blocks: Iterable[DocumentBlock]) -> str:
+    """Join rendered blocks with paragraph spacing preserved"""
+    return "\n\n".join(block_to_text(block) for block in blocks)
+
+
+def run_flags(run: TextRun) -> int:
+    """Bit flags describing the formatting of a run"""
+    return (FORMAT_BOLD if run.bold else 0) | (FORMAT_ITALIC if run.italic else 0) | (FORMAT_UNDERLINE if run.underline else 0)
+
+
+def formatting_spans(blocks: List[DocumentBlock]) -> List[Tuple[int, int, int]]:
+    """Return (start, end, flags) of every formatted run, as offsets into blocks_to_text(blocks)"""
+    spans = []
+    offset = 0
+    for index, block in enumerate(blocks):
+        if index:
+            offset += 2  # the paragraph break added by blocks_to_text
+        rendered = block_to_text(block)
+        if block.kind != "table":
+            # Skip the heading prefix; the runs cover exactly block.text
+            position = offset + len(rendered) - len(block.text)
+            for run in block.runs:
+                flags = run_flags(run)
+                if flags:
+                    spans.append((position, position + len(run.text), flags))
+                position += len(run.text)
+        offset += len(rendered)
+    return spans
+
+
+def _parse_package(data: bytes, reader) -> dict:
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        blocks = list(reader.iter_archive_blocks(archive))
+        properties = reader.read_core_properties(archive)
+        headers, footers = reader.read_headers_and_footers(archive)
+        images = reader.list_media(archive)
+
+    paragraphs = [block for block in blocks if block.kind != "table"]
+    stats = DocumentStats(
+        paragraphs=len(paragraphs),
+        characters=sum(len(block.text) for block in paragraphs),
+        words=sum(len(block.text.split()) for block in paragraphs),
+        tables=len(blocks) - len(paragraphs),
+    )
+
+    return {
+        "blocks": blocks,
+        "properties": properties,
+        "headers": headers,
+        "footers": footers,
+        "images": images,
+        "stats": stats,
+        "text": blocks_to_text(blocks),
+    }
+
+
+def _parse_pdf(data: bytes, workers: Optional[int] = None) -> dict:
+    blocks = list(iter_pdf_blocks(data, workers))
+    stats = DocumentStats(
+        paragraphs=len(blocks),
+        characters=sum(len(block.text) for block in blocks),
+        words=sum(len(block.text.split()) for block in blocks),
+        unit="pages",
+    )
+    return {"blocks": blocks, "stats": stats, "text": blocks_to_text(blocks)}
+
+
+def decode_text(data: bytes) -> Tuple[str, str]:
+    """Decode text bytes, returning the content and the encoding that was used
+
+    A BOM is trusted first, then a strict UTF-8 decode is tried, and only if
+    that fails is chardet run, on a bounded sample rather than the whole file.
+    """
+    for bom, encoding in _BOMS:
+        if data.startswith(bom):
+            return data.decode(encoding, errors='replace'), encoding
+    try:
+        return data.decode('utf-8'), 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    detected = chardet.detect(data[:_CHARDET_SAMPLE_SIZE])
+    encoding = detected['encoding'] if detected['encoding'] else 'utf-8'
+    try:
+        return data.decode(encoding), encoding
+    except (UnicodeDecodeError, LookupError):
+        # Fallback to latin-1 if detected encoding fails
+        return data.decode('latin-1', errors='replace'), 'latin-1'
+
+
+def _parse_text(data: bytes) -> dict:
+    content, encoding = decode_text(data)
+
+    stats = DocumentStats(
+        paragraphs=content.count('\n') + 1,
+        characters=len(content),
+        words=len(content.split()),
+        unit="lines",
+    )
+    return {"encoding": encoding, "stats": stats, "text": content}
+
+
+def parse_document(file_name: str, data: bytes, workers: Optional[int] = None) -> ParsedDocument:
+    """Parse document bytes once, returning the cached result on later calls
+
+    ``workers`` bounds the PDF page extraction pool; the default uses every core.
+    """
+    key = content_hash(data)
+    extension = file_type(file_name)
+    cache_key = (key, extension)
+    with _cache_lock:
+        cached = _cache.get(cache_key)
+        if cached is not None:
+            _cache.move_to_end(cache_key)
+            return cached
+
+    if extension in _PACKAGE_READERS:
+        parsed = _parse_package(data, _PACKAGE_READERS[extension])
+    elif extension in PDF_TYPES:
+        parsed = _parse_pdf(data, workers)
+    elif extension in TEXT_TYPES:
+        parsed = _parse_text(data)
+    else:
+        raise ValueError(f"Unsupported file type: {extension}")
+
+    document = ParsedDocument(
+        hash=key,
+        name=file_name,
+        type=extension,
+        mime=mimetypes.guess_type(file_name)[0],
+        size=len(data),
+        **parsed,
+    )
+
+    with _cache_lock:
+        _cache[cache_key] = document
+        _cache.move_to_end(cache_key)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    logger.info(f"Parsed {file_name} ({document.stats.summary})")
+    return document
+
+
+def iter_blocks(file_name: str, source) -> Iterator[DocumentBlock]:
+    """Stream the blocks of a .docx, .odt or .pdf without building a ParsedDocument
+
+    ``source`` is a path or the raw bytes of the document.
+    """
+    extension = file_type(file_name)
+    if extension in _PACKAGE_READERS:
+        with zipfile.ZipFile(io.BytesIO(source) if isinstance(source, bytes) else source) as archive:
+            yield from _PACKAGE_READERS[extension].iter_archive_blocks(archive)
+    elif extension in PDF_TYPES:
+        if not isinstance(source, bytes):
+            with open(source, 'rb') as f:
+                source = f.read()
+        yield from iter_pdf_blocks(source)
+    else:
+        raise ValueError(f"Streaming is not supported for file type: {extension}")
+
+
+def parse_uploaded_file(file) -> ParsedDocument:
+    """Parse a Streamlit UploadedFile"""
+    return parse_document(file.name, file.getvalue())
+
+
+def load_document(file_path: str) -> ParsedDocument:
+    """Parse a document from disk"""
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    return parse_document(os.path.basename(file_path), data)
@@ -0,0 +1,151 @@
+import bisect
+import re
+from typing import Any, Dict, List, Optional
+
+
+def _first_difference(a: str, b: str) -> int:
+    return next((j for j in range(min(len(a), len(b))) if a[j] != b[j]), min(len(a), len(b)))
+
+
+def _mismatch(line: int, position: int, original: str, typed: str) -> Dict[str, Any]:
+    return {
+        "type": "content_mismatch",
+        "line": line,
+        "position": position,
+        "original": original,
+        "typed": typed
+    }
+
+
+class DocumentVerifier:
+    """Class to verify document content and detect errors
+
+    Besides whole-text comparison, it can verify a document incrementally:
+    after ``begin`` each ``checkpoint`` compares only the lines a newly
+    typed window touches. Windows are recorded in order, exactly once, and
+    ``verified`` is the offset up to which the expected text is known to be
+    on screen. The final ``verify_document`` pass then only compares the
+    lines past that offset, as long as the verified prefix is unchanged.
+    """
+    def __init__(self):
+        self.begin("")
+
+    def begin(self, expected: str):
+        """Start incremental verification of ``expected``"""
+        self.expected = expected
+        # Offset of every line, found once per document
+        self._starts = [0] + [match.end() for match in re.finditer('\n', expected)]
+        self.verified = 0
+
+    def _line_end(self, index: int) -> int:
+        return self._starts[index + 1] if index + 1 < len(self._starts) else len(self.expected)
+
+    def confirm(self, start: int, text: str):
+        """Record that the window ``text``, typed from offset ``start``, is on screen as expected
+
+        Only the window that continues the verified prefix is recorded, so
+        recording the same window again has no effect.
+        """
+        if start == self.verified:
+            self.verified = min(len(self.expected), start + len(text))
+
+    def checkpoint(self, start: int, typed: str, end: Optional[int] = None) -> Dict[str, Any]:
+        """Compare ``typed``, the text typed for the expected window ``start:end``, line by line
+
+        Only the lines overlapping the window are looked at, so a window
+        that came out shorter than ``end`` (by default, the end of ``typed``)
+        is a mismatch. A window that matches is recorded with ``confirm``;
+        after correcting one that does not, the caller confirms the
+        corrected window itself.
+        """
+        end = max(start + len(typed), start if end is None else end)
+        errors = []
+
+        if end > len(self.expected):
+            errors.append({
+                "type": "extra_text",
+                "message": f"{end - len(self.expected)} characters typed past the end of the document"
+            })
+            end = len(self.expected)
+
+        index = bisect.bisect_right(self._starts, start) - 1
+        while index < len(self._starts) and self._starts[index] < end:
+            line_start, line_end = self._starts[index], self._line_end(index)
+            low, high = max(line_start, start), min(line_end, end)
+            expected_part = self.expected[low:high]
+            typed_part = typed[low - start:high - start]
+            if expected_part != typed_part:
+                pos = _first_difference(expected_part, typed_part)
+                errors.append(_mismatch(index + 1, low - line_start + pos + 1, expected_part, typed_part))
+                # Everything after a dropped or extra key is shifted, so stop here
+                break
+            index += 1
+
+        if not errors:
+            self.confirm(start, typed)
+        return {
+            "match": len(errors) == 0,
+            "errors": errors
+        }
+
+    def verify_document(self, typed: str) -> Dict[str, Any]:
+        """Final full-document pass, comparing only the lines past the verified prefix"""
+        if typed == self.expected:
+            return {"match": True, "errors": []}
+
+        # The line holding the end of the verified prefix may be partly unverified
+        first = 0
+        if self.verified and typed[:self.verified] == self.expected[:self.verified]:
+            first = bisect.bisect_right(self._starts, self.verified) - 1
+        offset = self._starts[first]
+        expected_lines = self.expected[offset:].split('\n')
+        typed_lines = typed[offset:].split('\n')
+
+        errors: List[Dict[str, Any]] = []
+        if len(expected_lines) != len(typed_lines):
+            errors.append({
+                "type": "line_count_mismatch",
+                "message": f"Line count mismatch: {first + len(expected_lines)} vs {first + len(typed_lines)}"
+            })
+
+        for i, (orig, typed_line) in enumerate(zip(expected_lines, typed_lines), first):
+            if orig != typed_line:
+                errors.append(_mismatch(i + 1, _first_difference(orig, typed_line) + 1, orig, typed_line))
+
+        return {
+            "match": len(errors) == 0,
+            "errors": errors
+        }
+
+    def compare_content(self, original: str, typed: str) -> Dict[str, Any]:
+        """Compare original content with typed content to detect errors"""
+        # Split into lines for comparison
+        original_lines = original.split('\n')
+        typed_lines = typed.split('\n')
+
+        errors = []
+
+        # Check length difference first
+        if len(original_lines) != len(typed_lines):
+            errors.append({
+                "type": "line_count_mismatch",
+                "message": f"Line count mismatch: {len(original_lines)} vs {len(typed_lines)}"
+            })
+
+        # Compare line by line
+        for i, (orig, typed) in enumerate(zip(original_lines, typed_lines[:len(original_lines)])):
+            if orig != typed:
+                # Find the position of the first difference
+                pos = next((j for j in range(min(len(orig), len(typed))) if orig[j] != typed[j]), min(len(orig), len(typed)))
+                errors.append({
+                    "type": "content_mismatch",
+                    "line": i + 1,
+                    "position": pos + 1,
+                    "original": orig,
+                    "typed": typed
+                })
+
+        return {
+            "match": len(errors) == 0,
+            "errors": errors
+        }
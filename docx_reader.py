@@ -0,0 +1,234 @@
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from models import DocumentBlock, TextRun
+from table_grid import TableGrid
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+W = "{%s}" % W_NS
+
+CORE_PROPERTIES_PART = "docProps/core.xml"
+DOCUMENT_PART = "word/document.xml"
+STYLES_PART = "word/styles.xml"
+MEDIA_PREFIX = "word/media/"
+
+_CORE_PROPERTIES = {
+    "author": "{http://purl.org/dc/elements/1.1/}creator",
+    "created": "{http://purl.org/dc/terms/}created",
+    "modified": "{http://purl.org/dc/terms/}modified",
+}
+_DATE_PROPERTIES = ("created", "modified")
+_HEADER_FOOTER_PART = re.compile(r"word/(header|footer)(\d*)\.xml$")
+
+# styles.xml stores built-in names in lowercase; Word shows them capitalized
+_UI_STYLE_NAMES = {name.lower(): name for name in
+                   ["Caption", "Footer", "Header"] + [f"Heading {level}" for level in range(1, 10)]}
+
+_OFF_VALUES = ("0", "false", "off", "none")
+
+# Paragraph children whose own w:r children are part of the paragraph text
+_RUN_WRAPPERS = (W + "hyperlink", W + "ins", W + "smartTag", W + "fldSimple")
+
+
+def _is_on(element: Optional[ET.Element]) -> bool:
+    """Return True if a toggle property like w:b or w:u is present and not switched off"""
+    if element is None:
+        return False
+    return element.get(W + "val", "true").lower() not in _OFF_VALUES
+
+
+def read_paragraph_styles(archive: zipfile.ZipFile) -> Dict[Optional[str], str]:
+    """Map paragraph style ids to display names; the None key holds the default style"""
+    styles = {}
+    if STYLES_PART not in archive.namelist():
+        return styles
+    with archive.open(STYLES_PART) as part:
+        root = ET.parse(part).getroot()
+    for style in root.iter(W + "style"):
+        if style.get(W + "type") != "paragraph":
+            continue
+        name_element = style.find(W + "name")
+        name = name_element.get(W + "val") if name_element is not None else style.get(W + "styleId")
+        name = _UI_STYLE_NAMES.get(name, name)
+        styles[style.get(W + "styleId")] = name
+        if style.get(W + "default") in ("1", "true"):
+            styles[None] = name
+    return styles
+
+
+def _run_text(run: ET.Element) -> str:
+    parts = []
+    for child in run:
+        if child.tag == W + "t":
+            parts.append(child.text or "")
+        elif child.tag == W + "tab":
+            parts.append("\t")
+        elif child.tag in (W + "br", W + "cr"):
+            parts.append("\n")
+    return "".join(parts)
+
+
+def _direct_runs(paragraph: ET.Element) -> Iterator[ET.Element]:
+    """The w:r elements of a paragraph, including those in hyperlinks, insertions and similar wrappers
+
+    Runs nested deeper, such as the text box content of a drawing, are not
+    part of the paragraph text, as with python-docx's ``Paragraph.text``.
+    """
+    for child in paragraph:
+        if child.tag == W + "r":
+            yield child
+        elif child.tag in _RUN_WRAPPERS:
+            yield from child.findall(W + "r")
+
+
+def _paragraph_runs(paragraph: ET.Element) -> List[TextRun]:
+    runs = []
+    for run in _direct_runs(paragraph):
+        text = _run_text(run)
+        if not text:
+            continue
+        props = run.find(W + "rPr")
+        bold = italic = underline = False
+        if props is not None:
+            bold = _is_on(props.find(W + "b"))
+            italic = _is_on(props.find(W + "i"))
+            underline = _is_on(props.find(W + "u"))
+        if runs and (runs[-1].bold, runs[-1].italic, runs[-1].underline) == (bold, italic, underline):
+            runs[-1].text += text
+        else:
+            runs.append(TextRun(text=text, bold=bold, italic=italic, underline=underline))
+    return runs
+
+
+def paragraph_text(paragraph: ET.Element) -> str:
+    """Plain text of a w:p element"""
+    return "".join(_run_text(run) for run in _direct_runs(paragraph))
+
+
+def heading_level(style_name: Optional[str]) -> int:
+    """Return the heading level of a style name, 0 if it is not a heading"""
+    if not style_name or not style_name.startswith('Heading'):
+        return 0
+    digits = style_name[len('Heading'):].strip()
+    return int(digits) if digits.isdigit() else 1
+
+
+def _paragraph_block(paragraph: ET.Element, styles: Dict[Optional[str], str]) -> DocumentBlock:
+    style_element = paragraph.find(W + "pPr/" + W + "pStyle")
+    style_id = style_element.get(W + "val") if style_element is not None else None
+    style = styles.get(style_id, style_id) if style_id else styles.get(None)
+    level = heading_level(style)
+    runs = _paragraph_runs(paragraph)
+    return DocumentBlock(
+        kind="heading" if level else "paragraph",
+        text="".join(run.text for run in runs),
+        style=style,
+        level=level,
+        runs=runs,
+    )
+
+
+def _int_property(parent: Optional[ET.Element], path: str, default: int) -> int:
+    element = parent.find(path) if parent is not None else None
+    if element is None:
+        return default
+    try:
+        return int(element.get(W + "val", default))
+    except ValueError:
+        return default
+
+
+def _table_block(table: ET.Element) -> DocumentBlock:
+    grid = TableGrid()
+    for row in table.findall(W + "tr"):
+        grid.start_row(skip=_int_property(row.find(W + "trPr"), W + "gridBefore", 0))
+        for cell in row.findall(W + "tc"):
+            props = cell.find(W + "tcPr")
+            col_span = _int_property(props, W + "gridSpan", 1)
+            merge = props.find(W + "vMerge") if props is not None else None
+            if merge is not None and merge.get(W + "val", "continue") == "continue":
+                grid.continue_cell(col_span)
+            else:
+                text = "\n".join(paragraph_text(p) for p in cell.findall(W + "p")).strip()
+                grid.add_cell(text, col_span)
+    return grid.block()
+
+
+def iter_archive_blocks(archive: zipfile.ZipFile) -> Iterator[DocumentBlock]:
+    """Yield body blocks from an already opened .docx archive"""
+    styles = read_paragraph_styles(archive)
+    with archive.open(DOCUMENT_PART) as part:
+        depth = 0
+        body = None
+        for event, element in ET.iterparse(part, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if depth == 2 and element.tag == W + "body":
+                    body = element
+                continue
+
+            depth -= 1
+            # document > body > top level paragraph or table
+            if depth != 2 or body is None:
+                continue
+            if element.tag == W + "p":
+                yield _paragraph_block(element, styles)
+            elif element.tag == W + "tbl":
+                yield _table_block(element)
+            body.clear()
+
+
+def iter_docx_blocks(source) -> Iterator[DocumentBlock]:
+    """Yield the paragraphs and tables of a .docx in body order while it is being read
+
+    ``source`` is a path or a binary file object. ``word/document.xml`` is
+    parsed incrementally, and each top level element is released as soon as
+    it has been turned into a block, so memory stays bounded on large files.
+    """
+    with zipfile.ZipFile(source) as archive:
+        yield from iter_archive_blocks(archive)
+
+
+def read_core_properties(archive: zipfile.ZipFile) -> Dict[str, Optional[str]]:
+    """Read author and dates from docProps/core.xml"""
+    properties = dict.fromkeys(_CORE_PROPERTIES)
+    if CORE_PROPERTIES_PART not in archive.namelist():
+        return properties
+    with archive.open(CORE_PROPERTIES_PART) as part:
+        root = ET.parse(part).getroot()
+    for key, tag in _CORE_PROPERTIES.items():
+        element = root.find(tag)
+        value = element.text.strip() if element is not None and element.text else None
+        if value and key in _DATE_PROPERTIES:
+            try:
+                value = str(datetime.fromisoformat(value.replace("Z", "+00:00")))
+            except ValueError:
+                pass
+        properties[key] = value
+    return properties
+
+
+def read_headers_and_footers(archive: zipfile.ZipFile) -> Tuple[List[str], List[str]]:
+    """Return the non-empty text of every header part and every footer part"""
+    found = {"header": [], "footer": []}
+    for name in archive.namelist():
+        match = _HEADER_FOOTER_PART.match(name)
+        if not match:
+            continue
+        with archive.open(name) as part:
+            root = ET.parse(part).getroot()
+        text = "\n".join(t for t in (paragraph_text(p) for p in root.iter(W + "p")) if t.strip())
+        if text:
+            found[match.group(1)].append((int(match.group(2) or 0), text))
+    return ([text for _, text in sorted(found["header"])],
+            [text for _, text in sorted(found["footer"])])
+
+
+def list_media(archive: zipfile.ZipFile) -> List[str]:
+    """Return the file names of the images stored in word/media"""
+    return [posixpath.basename(name) for name in archive.namelist()
+            if name.startswith(MEDIA_PREFIX) and not name.endswith("/")]
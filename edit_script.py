@@ -0,0 +1,32 @@
+from typing import List
+
+from diff_engine import diff_opcodes
+from models import EditOperation, TextComparison
+
+
+def edit_script(expected: str, actual: str) -> List[EditOperation]:
+    """Insert/delete/replace operations that turn ``actual`` into ``expected``
+
+    The common prefix and suffix are stripped before diffing, so the script
+    grows with the errors, not with the document. Positions are offsets
+    into ``actual``, in order.
+    """
+    return [
+        EditOperation(op=tag, position=i1, length=i2 - i1, text=expected[j1:j2])
+        for tag, i1, i2, j1, j2 in diff_opcodes(actual, expected)
+    ]
+
+
+def compare_texts(expected: str, actual: str) -> TextComparison:
+    """Similarity and edit script of ``actual`` against ``expected``, from one diff
+
+    The similarity is SequenceMatcher.ratio() over the characters the diff
+    keeps. Changed lines are aligned character by character, so it is never
+    lower than ratio() unless a long run of lines moved.
+    """
+    operations = edit_script(expected, actual)
+    total = len(expected) + len(actual)
+    if not total:
+        return TextComparison()
+    matched = len(actual) - sum(operation.length for operation in operations)
+    return TextComparison(similarity=200.0 * matched / total, operations=operations)
@@ -1,6 +1,7 @@
 from docx import Document
 from docx2python import docx2python
 import os
+from image_extractor import extract_images
 
 def analyze_docx(file_path) -> str:
 
@@ -43,16 +44,14 @@ def analyze_docx(file_path) -> str:
     
     print("\nImages:")
     image_dir = "extracted_images"
-    os.makedirs(image_dir, exist_ok=True)
-    for rel in doc.part.rels:
-        if "image" in doc.part.rels[rel].target_ref:
-            image_part = doc.part.rels[rel].target_part
-            image_data = image_part.blob
-            image_filename = os.path.basename(image_part.partname)
-            image_path = os.path.join(image_dir, image_filename)
-            with open(image_path, "wb") as img_file:
-                img_file.write(image_data)
-            print(f"Extracted image saved to: {image_path}")
+    manifest = extract_images(os.path.basename(file_path), file_path, image_dir)
+    for image in manifest.images:
+        if image.duplicate:
+            print(f"Image {image.name} is a duplicate of: {image.path}")
+        else:
+            print(f"Extracted image saved to: {image.path}")
+    for name in manifest.skipped:
+        print(f"Skipped image over the size limit: {name}")
     print("-" * 50)
 
 
@@ -232,9 +232,9 @@ from pydantic.error_wrappers import ValidationError
 from pynput.mouse import Button, Controller as MouseController
 from pynput.keyboard import Controller as KeyboardController
 import logging
-from difflib import SequenceMatcher
+from edit_script import compare_texts
 from helpers import GrammarChecker
-from models import DocumentContent, RetypedDocument
+from models import DocumentContent, EditOperation, RetypedDocument
 from typer import RealKeyboardTyper
 
 
@@ -248,6 +248,7 @@ class VerificationResult(BaseModel):
     """Class to store document verification results"""
     match_percentage: float
     differences: List[str] = []
+    edit_script: List[EditOperation] = []
     success: bool = False
     
     @property
@@ -293,28 +294,21 @@ class DocumentRetyper:
 
     async def verify_content(self, original_content: str, typed_content: str) -> VerificationResult:
         """Verify that typed content matches original content"""
-        # Calculate similarity ratio
-        similarity = SequenceMatcher(None, original_content, typed_content).ratio() * 100
+        # One diff gives the similarity ratio and the differences
+        comparison = compare_texts(original_content, typed_content)
+        similarity = comparison.similarity
         
-        # Find differences if needed (simplified version)
         differences = []
         if similarity < 95.0:
-            # Split by lines for easier comparison
-            original_lines = original_content.split('\n')
-            typed_lines = typed_content.split('\n')
-            
-            # Compare line by line
-            for i, (orig_line, typed_line) in enumerate(zip(original_lines, typed_lines)):
-                if orig_line != typed_line:
-                    differences.append(f"Line {i+1}: Expected '{orig_line}', got '{typed_line}'")
-            
-            # If line counts differ
-            if len(original_lines) != len(typed_lines):
-                differences.append(f"Line count mismatch: Expected {len(original_lines)}, got {len(typed_lines)}")
+            for operation in comparison.operations[:10]:  # Limit to first 10 differences
+                line = typed_content.count('\n', 0, operation.position) + 1
+                actual = typed_content[operation.position:operation.position + operation.length]
+                differences.append(f"Line {line}: Expected '{operation.text}', got '{actual}'")
         
         return VerificationResult(
             match_percentage=similarity,
-            differences=differences[:10],  # Limit to first 10 differences
+            differences=differences,
+            edit_script=comparison.operations,
             success=similarity >= 95.0
         )
     
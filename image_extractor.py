@@ -0,0 +1,111 @@
+import hashlib
+import io
+import logging
+import os
+import posixpath
+import tempfile
+import zipfile
+from typing import List, Optional
+
+from document_parser import file_type
+from models import ImageEntry, ImageManifest
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Where each package format keeps its embedded images
+MEDIA_PREFIXES = {"docx": "word/media/", "odt": "Pictures/"}
+
+CHUNK_SIZE = 64 * 1024
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+MAX_TOTAL_BYTES = 100 * 1024 * 1024
+
+
+class ImageLimitError(Exception):
+    """Raised when an image turns out larger than its declared or allowed size"""
+    pass
+
+
+def _open_archive(source):
+    return zipfile.ZipFile(io.BytesIO(source) if isinstance(source, bytes) else source)
+
+
+def _media_members(archive: zipfile.ZipFile, file_name: str) -> List[zipfile.ZipInfo]:
+    prefix = MEDIA_PREFIXES.get(file_type(file_name))
+    if prefix is None:
+        return []
+    return [info for info in archive.infolist() if info.filename.startswith(prefix) and not info.is_dir()]
+
+
+def list_images(file_name: str, source) -> ImageManifest:
+    """Describe the embedded images from the zip directory alone, without reading any image data"""
+    with _open_archive(source) as archive:
+        entries = [ImageEntry(name=posixpath.basename(info.filename), member=info.filename, size=info.file_size)
+                   for info in _media_members(archive, file_name)]
+    return ImageManifest(images=entries, total_bytes=sum(entry.size for entry in entries))
+
+
+def _copy_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo, target, limit: int) -> str:
+    """Stream one member into ``target`` in bounded chunks and return its SHA-256"""
+    digest = hashlib.sha256()
+    written = 0
+    with archive.open(info) as member:
+        while True:
+            chunk = member.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            written += len(chunk)
+            # Declared sizes can lie, so the limit is enforced on the bytes actually read
+            if written > limit:
+                raise ImageLimitError(f"{info.filename} exceeds {limit} bytes")
+            digest.update(chunk)
+            target.write(chunk)
+    return digest.hexdigest()
+
+
+def extract_images(file_name: str, source, output_dir: Optional[str] = None,
+                   max_image_bytes: int = MAX_IMAGE_BYTES,
+                   max_total_bytes: int = MAX_TOTAL_BYTES) -> ImageManifest:
+    """Stream the embedded images of a .docx or .odt to disk, storing identical images once
+
+    Images are written under their content hash, so a logo repeated on
+    every page is kept as a single file. Images over ``max_image_bytes`` and
+    anything past ``max_total_bytes`` for the document are skipped.
+    """
+    output_dir = output_dir or os.path.join(tempfile.gettempdir(), "ai_typer_images")
+    os.makedirs(output_dir, exist_ok=True)
+
+    manifest = ImageManifest()
+    stored = {}
+    with _open_archive(source) as archive:
+        for info in _media_members(archive, file_name):
+            name = posixpath.basename(info.filename)
+            remaining = max_total_bytes - manifest.total_bytes
+            limit = min(max_image_bytes, remaining)
+            if info.file_size > limit:
+                manifest.skipped.append(name)
+                continue
+
+            fd, temp_path = tempfile.mkstemp(dir=output_dir, suffix=".part")
+            try:
+                with os.fdopen(fd, "wb") as target:
+                    sha256 = _copy_member(archive, info, target, limit)
+            except (ImageLimitError, zipfile.BadZipFile, OSError) as e:
+                logger.warning(f"Skipping image {name}: {str(e)}")
+                os.unlink(temp_path)
+                manifest.skipped.append(name)
+                continue
+
+            entry = ImageEntry(name=name, member=info.filename, size=info.file_size, sha256=sha256)
+            if sha256 in stored:
+                os.unlink(temp_path)
+                entry.path = stored[sha256]
+                entry.duplicate = True
+            else:
+                path = os.path.join(output_dir, sha256 + os.path.splitext(name)[1].lower())
+                os.replace(temp_path, path)
+                stored[sha256] = entry.path = path
+                manifest.total_bytes += info.file_size
+            manifest.images.append(entry)
+
+    return manifest
@@ -0,0 +1,251 @@
+import logging
+import os
+import sys
+from collections import OrderedDict
+from typing import Dict, Optional, Type
+
+import keyboard
+from pynput.keyboard import Key
+
+from input_strategies import (COMPOSE, DIRECT, SHIFTED, UNICODE, WRITE, StrategyTable, XKeymap,
+                              typeable)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# X keysym names of the pynput keys the typer sends
+_XK_NAMES = {
+    Key.enter: "Return", Key.tab: "Tab", Key.space: "space", Key.ctrl: "Control_L",
+    Key.shift: "Shift_L", Key.backspace: "BackSpace", Key.delete: "Delete", Key.esc: "Escape",
+    Key.left: "Left", Key.right: "Right", Key.home: "Home", Key.end: "End",
+}
+
+
+class InputBackend:
+    """How key events reach the display
+
+    ``send`` may only queue an event; ``flush`` delivers everything queued
+    so far. The keystroke thread flushes once per batch, right before it
+    waits for the next deadline.
+    """
+
+    name = "base"
+    strategies: Optional[StrategyTable] = None
+
+    @classmethod
+    def available(cls) -> bool:
+        return False
+
+    def prepare(self, text: str):
+        """Resolve how each distinct character of ``text`` is typed, before typing starts"""
+        if self.strategies is not None:
+            self.strategies.prepare(text)
+
+    def send(self, key, ctrl: bool = False):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def write(self, char: str):
+        """Slow path for characters ``send`` could not type"""
+        keyboard.write(char)
+
+    def close(self):
+        pass
+
+
+class PynputBackend(InputBackend):
+    """One press/release pair per event through a pynput controller
+
+    pynput finds the key (and borrows a keycode for characters missing from
+    the layout) on its own; the strategy table only keeps characters no key
+    can produce away from it, so they never raise mid-document.
+    """
+
+    name = "pynput"
+
+    def __init__(self, controller=None):
+        if controller is None:
+            from pynput.keyboard import Controller
+            controller = Controller()
+        self.controller = controller
+        self.keymap = XKeymap.open() if sys.platform.startswith("linux") else None
+        self.strategies = StrategyTable(self._resolve)
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    def _resolve(self, char: str):
+        if not typeable(char):
+            return WRITE, None
+        if self.keymap is None:
+            return DIRECT, None
+        key = self.keymap.key(char)
+        return key if key is not None else (UNICODE, None)
+
+    def close(self):
+        # The keymap holds its own display connection
+        if self.keymap is not None:
+            self.keymap.close()
+            self.keymap = None
+
+    def send(self, key, ctrl: bool = False):
+        if isinstance(key, str) and self.strategies[key][0] == WRITE:
+            self.write(key)
+            return
+        controller = self.controller
+        if ctrl:
+            with controller.pressed(Key.ctrl):
+                controller.press(key)
+                controller.release(key)
+        else:
+            controller.press(key)
+            controller.release(key)
+
+
+class XTestBackend(InputBackend):
+    """Queue fake key events through the XTEST extension and flush them in batches
+
+    Events are written to the Xlib output buffer without waiting for the
+    server, so a whole batch costs a single round trip instead of one per
+    event. Every character is typed the way the strategy table picked for
+    it: its own key, Shift plus a key, a Compose sequence, or its Unicode
+    keysym mapped onto a spare keycode.
+    """
+
+    name = "xtest"
+
+    def __init__(self, display=None):
+        from Xlib import X, XK
+        from Xlib.display import Display
+        from Xlib.ext import xtest
+
+        self._press = X.KeyPress
+        self._release = X.KeyRelease
+        self._fake_input = xtest.fake_input
+        self.display = display or Display()
+        self.keymap = XKeymap(self.display)
+        self.strategies = StrategyTable(self.keymap.resolve)
+        self._keys = {key: self.display.keysym_to_keycode(XK.string_to_keysym(name))
+                      for key, name in _XK_NAMES.items()}
+        # Keysym -> spare keycode it is mapped onto, least recently used first
+        self._spare_keysyms: "OrderedDict[int, int]" = OrderedDict()
+        self._free_spares = list(reversed(self.keymap.spare_keycodes))
+
+    @classmethod
+    def available(cls) -> bool:
+        if not os.environ.get("DISPLAY"):
+            return False
+        try:
+            from Xlib.display import Display
+            display = Display()
+        except Exception:
+            return False
+        try:
+            return display.has_extension("XTEST")
+        finally:
+            display.close()
+
+    def _tap(self, keycode: int, shift: bool = False, ctrl: bool = False):
+        fake_input = self._fake_input
+        display = self.display
+        if ctrl:
+            fake_input(display, self._press, self._keys[Key.ctrl])
+        if shift:
+            fake_input(display, self._press, self._keys[Key.shift])
+        fake_input(display, self._press, keycode)
+        fake_input(display, self._release, keycode)
+        if shift:
+            fake_input(display, self._release, self._keys[Key.shift])
+        if ctrl:
+            fake_input(display, self._release, self._keys[Key.ctrl])
+
+    def send(self, key, ctrl: bool = False):
+        if not isinstance(key, str):
+            self._tap(self._keys[key], ctrl=ctrl)
+            return
+        strategy, payload = self.strategies[key]
+        if strategy == DIRECT or strategy == SHIFTED:
+            self._tap(payload, strategy == SHIFTED, ctrl)
+        elif strategy == COMPOSE:
+            self._tap(self.keymap.compose_keycode)
+            for part_strategy, keycode in payload:
+                self._tap(keycode, part_strategy == SHIFTED)
+        elif strategy == UNICODE:
+            self._tap(self._spare_keycode(payload))
+        else:
+            self.write(key)
+
+    def _spare_keycode(self, keysym: int) -> int:
+        """A spare keycode that types ``keysym``, remapping one if none does yet
+
+        Characters rotate through all spare keycodes, so a keycode is only
+        remapped after the others have been used. Before a keycode that is
+        already mapped gets a new keysym, the queued events are sent and the
+        server is waited for, so events still using it are not typed with
+        the new mapping.
+        """
+        keycode = self._spare_keysyms.get(keysym)
+        if keycode is not None:
+            self._spare_keysyms.move_to_end(keysym)
+            return keycode
+        if self._free_spares:
+            keycode = self._free_spares.pop()
+        else:
+            _, keycode = self._spare_keysyms.popitem(last=False)
+            self.display.sync()
+        # Requests are handled in order, so the remapping reaches the
+        # server (and clients, as MappingNotify) before the key event
+        self.display.change_keyboard_mapping(keycode, [(keysym, keysym)])
+        self._spare_keysyms[keysym] = keycode
+        return keycode
+
+    def flush(self):
+        self.display.flush()
+
+    def write(self, char: str):
+        self.flush()
+        super().write(char)
+
+    def close(self):
+        for keycode in self._spare_keysyms.values():
+            self.display.change_keyboard_mapping(keycode, [(0, 0)])
+        self.display.close()
+
+
+# Fastest first; the selector takes the first one the display supports
+BACKENDS: Dict[str, Type[InputBackend]] = {
+    XTestBackend.name: XTestBackend,
+    PynputBackend.name: PynputBackend,
+}
+
+
+def select_backend(name: Optional[str] = None, controller=None) -> InputBackend:
+    """Create the input backend called ``name``, or the fastest available one for ``"auto"``
+
+    ``name`` defaults to the ``TYPER_INPUT_BACKEND`` environment variable
+    and then to pynput. A named backend that is unavailable falls back to
+    pynput with a warning.
+    """
+    name = (name or os.environ.get("TYPER_INPUT_BACKEND") or PynputBackend.name).lower()
+    if name == "auto":
+        candidates = list(BACKENDS.values())
+    elif name in BACKENDS:
+        candidates = [BACKENDS[name]]
+    else:
+        logger.warning(f"Unknown input backend '{name}', using pynput")
+        candidates = []
+
+    for backend in candidates:
+        if backend is PynputBackend:
+            break
+        try:
+            if backend.available():
+                return backend()
+        except Exception as e:
+            logger.warning(f"Input backend '{backend.name}' failed to start: {str(e)}")
+    if name in BACKENDS and name != PynputBackend.name:
+        logger.warning(f"Input backend '{name}' is not available on this display, using pynput")
+    return PynputBackend(controller)
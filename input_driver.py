@@ -0,0 +1,110 @@
+import asyncio
+
+from pynput.keyboard import Key
+from pynput.mouse import Button
+
+from document_parser import FORMAT_BOLD, FORMAT_ITALIC, FORMAT_UNDERLINE
+
+# Ctrl shortcut that toggles each formatting flag
+FORMAT_SHORTCUTS = {FORMAT_BOLD: 'b', FORMAT_ITALIC: 'i', FORMAT_UNDERLINE: 'u'}
+
+# Time the editor needs to react to a shortcut, a click or a selection step
+SHORTCUT_SETTLE = 0.1
+CLICK_SETTLE = 0.1
+SELECTION_STEP = 0.01
+# Caret moves are sent in batches of this many arrow keys, one settle per batch
+NAVIGATION_BATCH = 100
+
+
+class InputDriver:
+    """Awaitable keyboard and mouse primitives
+
+    pynput calls return immediately; the pauses the editor needs between
+    them are awaited with ``asyncio.sleep``, so the event loop keeps serving
+    progress callbacks and other tasks while a shortcut settles.
+    """
+
+    def __init__(self, keyboard, mouse):
+        self.keyboard = keyboard
+        self.mouse = mouse
+
+    async def tap(self, key, settle: float = 0.0):
+        """Press and release a single key"""
+        self.keyboard.press(key)
+        self.keyboard.release(key)
+        if settle:
+            await asyncio.sleep(settle)
+
+    async def shortcut(self, key, modifier=Key.ctrl, settle: float = SHORTCUT_SETTLE):
+        """Press ``key`` while holding ``modifier``"""
+        with self.keyboard.pressed(modifier):
+            self.keyboard.press(key)
+            self.keyboard.release(key)
+        if settle:
+            await asyncio.sleep(settle)
+
+    async def toggle_format(self, flag: int):
+        """Toggle one of the FORMAT_* flags with its Ctrl shortcut"""
+        await self.shortcut(FORMAT_SHORTCUTS[flag])
+
+    async def click(self, position=None):
+        """Click at ``position`` (or where the pointer is) and put the pointer back"""
+        if position:
+            # Save current position
+            old_pos = self.mouse.position
+            # Move to target position
+            self.mouse.position = position
+            await asyncio.sleep(CLICK_SETTLE)
+            # Click to focus
+            self.mouse.click(Button.left)
+            await asyncio.sleep(CLICK_SETTLE)
+            # Return to original position to avoid interference
+            self.mouse.position = old_pos
+        else:
+            # Just click at current position
+            self.mouse.click(Button.left)
+            await asyncio.sleep(CLICK_SETTLE)
+
+    async def select_all_and_copy(self):
+        """Select everything in the focused field and copy it; the caller waits for the clipboard"""
+        await self.shortcut('a', settle=0.0)
+        await self.shortcut('c', settle=0.0)
+
+    async def select_all_and_delete(self):
+        """Select everything in the focused field and delete it"""
+        await self.shortcut('a')
+        await self.tap(Key.delete, SHORTCUT_SETTLE)
+
+    async def select(self, count: int = 1, direction: str = "forward"):
+        """Extend the selection by ``count`` characters"""
+        key = Key.right if direction == "forward" else Key.left
+        with self.keyboard.pressed(Key.shift):
+            for _ in range(count):
+                self.keyboard.press(key)
+                self.keyboard.release(key)
+                await asyncio.sleep(SELECTION_STEP)
+
+    async def move_cursor(self, offset: int):
+        """Move the caret ``offset`` characters right (or left when negative)
+
+        Arrow keys only move the caret, so they go out NAVIGATION_BATCH at a
+        time with one settle after each batch rather than after every key.
+        """
+        key = Key.right if offset > 0 else Key.left
+        for sent in range(1, abs(offset) + 1):
+            await self.tap(key)
+            if sent % NAVIGATION_BATCH == 0 or sent == abs(offset):
+                await asyncio.sleep(SELECTION_STEP)
+
+    async def document_start(self):
+        """Put the caret before the first character of the document"""
+        await self.shortcut(Key.home)
+
+    async def document_end(self):
+        """Put the caret after the last character of the document"""
+        await self.shortcut(Key.end)
+
+    async def backspace(self, count: int = 1):
+        """Delete ``count`` characters before the caret"""
+        for _ in range(count):
+            await self.tap(Key.backspace, SELECTION_STEP)
@@ -0,0 +1,148 @@
+import os
+import unicodedata
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# How a character is produced, fastest first
+DIRECT = 0      # a key of the active layout, unshifted
+SHIFTED = 1     # a key of the active layout with Shift held
+COMPOSE = 2     # the Compose (Multi_key) key followed by a short sequence
+UNICODE = 3     # its Unicode keysym, mapped onto a spare keycode on demand
+WRITE = 4       # handed to keyboard.write as a last resort
+
+STRATEGY_NAMES = ("direct", "shifted", "compose", "unicode", "write")
+
+# Compose sequences of the default X11 (en_US.UTF-8) Compose table for
+# typographic characters common in documents
+COMPOSE_SEQUENCES = {
+    "—": "---", "–": "--.", "…": "..",
+    "“": "<\"", "”": ">\"", "‘": "<'", "’": ">'",
+    "«": "<<", "»": ">>", "©": "oc", "®": "or", "™": "TM",
+    "°": "oo", "±": "+-", "€": "C=", "£": "L-", "ß": "ss",
+    "½": "12", "¼": "14", "¾": "34", "×": "xx", "÷": ":-",
+}
+
+# Combining marks and the Compose prefix that produces them on a base letter
+_COMBINING_COMPOSE = {
+    "\u0301": "'", "\u0300": "`", "\u0302": "^", "\u0308": "\"",
+    "\u0303": "~", "\u0327": ",", "\u030a": "o", "\u030c": "c",
+}
+
+# Most keycodes without keysyms that Unicode characters are rotated through
+MAX_SPARE_KEYCODES = 8
+
+# Categories that no key produces; these always go to keyboard.write
+_UNTYPEABLE_CATEGORIES = {"Cc", "Cf", "Cs", "Co", "Cn"}
+
+
+def keysym_for(char: str) -> int:
+    """X keysym of a character"""
+    code = ord(char)
+    # Latin-1 keysyms equal their code points; everything else uses the Unicode range
+    return code if 0x20 <= code < 0x100 else 0x01000000 | code
+
+
+def compose_sequence(char: str) -> Optional[str]:
+    """The Compose sequence typing ``char``, if the default Compose table has one"""
+    if char in COMPOSE_SEQUENCES:
+        return COMPOSE_SEQUENCES[char]
+    decomposed = unicodedata.normalize("NFD", char)
+    if len(decomposed) == 2 and decomposed[1] in _COMBINING_COMPOSE and decomposed[0].isascii():
+        return _COMBINING_COMPOSE[decomposed[1]] + decomposed[0]
+    return None
+
+
+def typeable(char: str) -> bool:
+    return unicodedata.category(char) not in _UNTYPEABLE_CATEGORIES
+
+
+class XKeymap:
+    """What the active X keyboard layout can produce, read from the cached keymap
+
+    Lookups use the mapping python-xlib fetched when the display was
+    opened, so classifying characters costs no server round trips.
+    """
+
+    def __init__(self, display):
+        from Xlib import XK
+        self.display = display
+        multi_key = XK.string_to_keysym("Multi_key")
+        self.compose_keycode = display.keysym_to_keycode(multi_key) or None
+        self.spare_keycodes = self._find_spares()
+
+    @classmethod
+    def open(cls) -> Optional["XKeymap"]:
+        """The keymap of $DISPLAY, or None when there is no X display"""
+        if not os.environ.get("DISPLAY"):
+            return None
+        try:
+            from Xlib.display import Display
+            return cls(Display())
+        except Exception:
+            return None
+
+    def close(self):
+        self.display.close()
+
+    def _find_spares(self) -> List[int]:
+        """Keycodes with no keysyms, which Unicode characters can be mapped onto"""
+        first = self.display.display.info.min_keycode
+        count = self.display.display.info.max_keycode - first + 1
+        mapping = self.display.get_keyboard_mapping(first, count)
+        spares = [first + offset for offset, keysyms in enumerate(mapping) if not any(keysyms)]
+        return spares[:MAX_SPARE_KEYCODES]
+
+    def key(self, char: str) -> Optional[Tuple[int, int]]:
+        """(DIRECT or SHIFTED, keycode) if a key of the layout types ``char``"""
+        for keycode, index in self.display.keysym_to_keycodes(keysym_for(char)):
+            if index in (0, 1):
+                return (SHIFTED if index else DIRECT), keycode
+        return None
+
+    def resolve(self, char: str) -> Tuple[int, object]:
+        """Pick the fastest strategy for ``char`` and what it needs to run"""
+        if not typeable(char):
+            return WRITE, None
+        key = self.key(char)
+        if key is not None:
+            return key
+        sequence = compose_sequence(char)
+        if sequence and self.compose_keycode:
+            keys = [self.key(part) for part in sequence]
+            if all(keys):
+                return COMPOSE, keys
+        if self.spare_keycodes:
+            return UNICODE, keysym_for(char)
+        return WRITE, None
+
+
+class StrategyTable:
+    """Character to (strategy, payload), resolved once per character for a session
+
+    ``prepare`` resolves every distinct character of a text before typing
+    starts, so the keystroke thread only does dictionary lookups. Call
+    ``clear`` when the keyboard layout changes.
+    """
+
+    def __init__(self, resolve: Callable[[str], Tuple[int, object]]):
+        self._resolve = resolve
+        self._table: Dict[str, Tuple[int, object]] = {}
+
+    def prepare(self, chars: Iterable[str]):
+        for char in set(chars).difference(self._table):
+            self._table[char] = self._resolve(char)
+
+    def __getitem__(self, char: str) -> Tuple[int, object]:
+        entry = self._table.get(char)
+        if entry is None:
+            entry = self._table[char] = self._resolve(char)
+        return entry
+
+    def clear(self):
+        self._table.clear()
+
+    def summary(self) -> Dict[str, int]:
+        """How many distinct characters use each strategy"""
+        counts = {}
+        for strategy, _ in self._table.values():
+            counts[STRATEGY_NAMES[strategy]] = counts.get(STRATEGY_NAMES[strategy], 0) + 1
+        return counts
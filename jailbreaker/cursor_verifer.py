@@ -11,11 +11,11 @@ import traceback
 from pynput.mouse import Button, Controller as MouseController
 from pynput.keyboard import Controller as KeyboardController, Key
 import logging
-from difflib import SequenceMatcher
-import pyperclip
 import pypandoc
 
-from models import DocumentContent, RetypedDocument
+from clipboard_watch import ClipboardReader
+from edit_script import compare_texts
+from models import DocumentContent, EditOperation, RetypedDocument, TextComparison
 from typer import RealKeyboardTyper
 
 load_dotenv()
@@ -33,6 +33,7 @@ class VerificationResult(BaseModel):
     """Class to store document verification results"""
     match_percentage: float
     errors: List[DocumentError] = []
+    edit_script: List[EditOperation] = []
     success: bool = False
     
     @property
@@ -47,11 +48,17 @@ class DocumentRetyper:
         self.keyboard_typer = RealKeyboardTyper(delay=0.02)  # Increased delay for stability
         self.keyboard = KeyboardController()
         self.mouse = MouseController()
+        self.clipboard = ClipboardReader()
         self.original_content = ""
         self.retyped_content = ""
         self.max_chunk_size = 500  # Type in smaller chunks to prevent freezing
         self.chunk_pause = 0.5  # Pause between chunks
         
+    def close(self):
+        """Release the keyboard typer and the clipboard watch"""
+        self.keyboard_typer.close()
+        self.clipboard.close()
+        
     async def async_init(self):
         """Async initialization method"""
         self.document_retyper = Agent(
@@ -166,36 +173,24 @@ class DocumentRetyper:
                 
             await asyncio.sleep(0.1)  # Pause between chunks
     
+    async def _select_all_and_copy_keys(self):
+        """Press Ctrl+A then Ctrl+C; the editor handles them in order"""
+        for key in ('a', 'c'):
+            self.keyboard.press(Key.ctrl)
+            self.keyboard.press(key)
+            self.keyboard.release(key)
+            self.keyboard.release(Key.ctrl)
+
     async def select_all_and_copy(self):
-        """Select all text and copy to clipboard with improved reliability"""
+        """Select all text and copy to clipboard, returning as soon as the copy lands"""
         # Try multiple times in case of failure
         for attempt in range(3):
             try:
-                # Clear clipboard first
-                pyperclip.copy('')
-                await asyncio.sleep(0.2)
-                
-                # Select all text
-                self.keyboard.press(Key.ctrl)
-                self.keyboard.press('a')
-                self.keyboard.release('a')
-                self.keyboard.release(Key.ctrl)
-                await asyncio.sleep(0.5)  # Longer pause for large documents
-                
-                # Copy to clipboard
-                self.keyboard.press(Key.ctrl)
-                self.keyboard.press('c')
-                self.keyboard.release('c')
-                self.keyboard.release(Key.ctrl)
-                await asyncio.sleep(0.5)  # Longer pause for clipboard operation
-                
-                # Get clipboard content
-                result = pyperclip.paste()
+                result = await self.clipboard.capture(self._select_all_and_copy_keys)
                 if result:
                     return result
                     
                 print(f"Copy attempt {attempt+1} failed. Retrying...")
-                await asyncio.sleep(1)  # Wait before retry
                 
             except Exception as e:
                 print(f"Error during copy operation (attempt {attempt+1}): {str(e)}")
@@ -205,81 +200,37 @@ class DocumentRetyper:
         return ""  # Return empty string if all attempts fail
     
     async def find_all_errors(self, original: str, typed: str, max_errors: int = 20) -> List[DocumentError]:
-        """Find all errors between original and typed content with a limit and improved accuracy"""
+        """Find all errors between original and typed content with a limit"""
+        return self.errors_from_comparison(compare_texts(original, typed), typed, max_errors)
+
+    def errors_from_comparison(self, comparison: TextComparison, typed: str, max_errors: int = 20) -> List[DocumentError]:
+        """One error per edit of an already computed comparison
+
+        The linear-space Myers diff behind ``compare_texts`` keeps every
+        error aligned with the typed text across dropped or doubled
+        characters, and stays well under a second on megabyte-sized documents.
+        """
         errors = []
-        
-        # For very large documents, use difflib for more efficient comparison
-        if len(original) > 10000 or len(typed) > 10000:
-            print("Large document detected. Using efficient diff algorithm...")
-            import difflib
-            matcher = difflib.SequenceMatcher(None, original, typed)
-            
-            # Process diff blocks
-            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-                if tag != 'equal' and len(errors) < max_errors:
-                    # Found a difference
-                    context_start = max(0, j1 - 10)
-                    context_end = min(j2 + 10, len(typed))
-                    
-                    errors.append(DocumentError(
-                        position=j1,
-                        expected=original[i1:i2],
-                        actual=typed[j1:j2],
-                        context=f"...{typed[context_start:context_end]}..."
-                    ))
-        else:
-            # For smaller documents, use character-by-character comparison
-            min_len = min(len(original), len(typed))
-            position = 0
-            error_start = -1
-            
-            while position < min_len and len(errors) < max_errors:
-                if original[position] != typed[position]:
-                    # Start of an error
-                    if error_start == -1:
-                        error_start = position
-                elif error_start != -1:
-                    # End of an error
-                    context_start = max(0, error_start - 10)
-                    context_end = min(position + 10, min_len)
-                    
-                    errors.append(DocumentError(
-                        position=error_start,
-                        expected=original[error_start:position],
-                        actual=typed[error_start:position],
-                        context=f"...{typed[context_start:context_end]}..."
-                    ))
-                    error_start = -1
-                position += 1
-            
-            # Handle error at end of document
-            if error_start != -1 and len(errors) < max_errors:
-                errors.append(DocumentError(
-                    position=error_start,
-                    expected=original[error_start:min_len],
-                    actual=typed[error_start:min_len],
-                    context=f"...{typed[max(0, error_start-10):min_len]}"
-                ))
-        
-        # Check for length differences
-        if len(original) > len(typed) and len(errors) < max_errors:
-            # Missing content at the end
-            errors.append(DocumentError(
-                position=len(typed),
-                expected=original[len(typed):len(typed)+20] + "..." if len(original) - len(typed) > 20 else original[len(typed):],
-                actual="",
-                context="[End of document - missing content]"
-            ))
-        elif len(typed) > len(original) and len(errors) < max_errors:
-            # Extra content at the end
+
+        for operation in comparison.operations[:max_errors]:
+            start, end = operation.position, operation.position + operation.length
+            if start == len(typed) and not operation.length:
+                context = "[End of document - missing content]"
+            elif end == len(typed) and not operation.text and operation.length:
+                context = "[End of document - extra content]"
+            else:
+                context_start = max(0, start - 10)
+                context_end = min(end + 10, len(typed))
+                context = f"...{typed[context_start:context_end]}..."
+
             errors.append(DocumentError(
-                position=len(original),
-                expected="",
-                actual=typed[len(original):len(original)+20] + "..." if len(typed) - len(original) > 20 else typed[len(original):],
-                context="[End of document - extra content]"
+                position=start,
+                expected=operation.text,
+                actual=typed[start:end],
+                context=context
             ))
-        
-        if len(errors) >= max_errors:
+
+        if len(comparison.operations) > max_errors:
             print(f"Warning: Found {max_errors}+ errors. Limiting to first {max_errors} for performance.")
             
         return errors
@@ -344,18 +295,18 @@ class DocumentRetyper:
         current_content = await self.select_all_and_copy()
         self.retyped_content = current_content
         
-        # Calculate similarity
-        similarity = SequenceMatcher(None, original_content, current_content).ratio() * 100
-        print(f"Document similarity: {similarity:.2f}%")
-        
-        # Find all errors (with reduced limit for performance)
+        # One diff gives both the similarity and the errors
         print("2. Analyzing for errors...")
-        errors = await self.find_all_errors(original_content, current_content, max_errors=20)
+        comparison = compare_texts(original_content, current_content)
+        similarity = comparison.similarity
+        print(f"Document similarity: {similarity:.2f}%")
+        errors = self.errors_from_comparison(comparison, current_content, max_errors=20)
         
         # Create verification result
         result = VerificationResult(
             match_percentage=similarity,
             errors=errors,
+            edit_script=comparison.operations,
             success=(not errors and similarity >= 99.0)
         )
         
@@ -0,0 +1,160 @@
+import random
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+from pynput.keyboard import Key
+
+from input_driver import FORMAT_SHORTCUTS, SHORTCUT_SETTLE
+
+MOD_CTRL = 1
+
+# Keys that must be sent as named keys rather than as characters
+SPECIAL_KEYS = {'\n': Key.enter, '\t': Key.tab, ' ': Key.space}
+
+# Ctrl shortcut that toggles each formatting flag
+TOGGLE_KEYS = tuple(FORMAT_SHORTCUTS.items())
+TOGGLE_DELAY = SHORTCUT_SETTLE
+
+# Where a burst ends in each burst mode
+BURST_BOUNDARIES = {
+    "word": str.isspace,
+    "line": lambda char: char == '\n',
+}
+
+
+class KeystrokePlan:
+    """Key events compiled ahead of typing, stored as parallel arrays
+
+    Event ``i`` presses ``keys[i]`` while holding the modifiers in
+    ``modifiers[i]``, then waits ``delays[i]``. ``toggles[i]`` holds the
+    formatting flag an event switches (0 for ordinary characters) and
+    ``offsets[i]`` the index in ``text`` of the character it types (-1 for
+    toggles). ``char_events[n]`` is the first event of character ``n``,
+    counting any formatting toggles sent right before it.
+    """
+
+    __slots__ = ("text", "keys", "modifiers", "toggles", "delays", "offsets", "char_events")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.keys: List[object] = []
+        self.modifiers = bytearray()
+        self.toggles = bytearray()
+        self.delays = array('d')
+        self.offsets = array('l')
+        self.char_events = array('l')
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _add(self, key, modifiers: int, toggle: int, delay: float, offset: int):
+        self.keys.append(key)
+        self.modifiers.append(modifiers)
+        self.toggles.append(toggle)
+        self.delays.append(delay)
+        self.offsets.append(offset)
+
+    def event_at_char(self, char_index: int) -> int:
+        """Index of the first event of character ``char_index``, including the toggles before it"""
+        if char_index >= len(self.char_events):
+            return len(self.keys)
+        return self.char_events[char_index]
+
+    def slices(self, chars_per_slice: int) -> Iterable[Tuple[int, int, int]]:
+        """Yield (first_event, end_event, chars_typed_after) covering the plan in steps of characters"""
+        total = len(self.text)
+        for start_char in range(0, total, chars_per_slice):
+            end_char = min(start_char + chars_per_slice, total)
+            yield self.event_at_char(start_char), self.event_at_char(end_char), end_char
+
+
+def _active_flags(spans: Iterable[Tuple[int, int, int]], length: int) -> List[Tuple[int, int]]:
+    """Turn possibly overlapping spans into (position, active_flags) change points"""
+    deltas = {}
+    for start, end, flags in spans:
+        start, end = max(0, start), min(length, end)
+        if start >= end or not flags:
+            continue
+        for flag, _ in TOGGLE_KEYS:
+            if flags & flag:
+                deltas.setdefault(start, {}).setdefault(flag, 0)
+                deltas[start][flag] += 1
+                deltas.setdefault(end, {}).setdefault(flag, 0)
+                deltas[end][flag] -= 1
+
+    counts = {flag: 0 for flag, _ in TOGGLE_KEYS}
+    changes = []
+    for position in sorted(deltas):
+        for flag, delta in deltas[position].items():
+            counts[flag] += delta
+        changes.append((position, sum(flag for flag, count in counts.items() if count > 0)))
+    return changes
+
+
+def _batch_delays(plan: KeystrokePlan, burst: str, burst_size: int):
+    """Move the delays of each burst onto its last event, leaving the rest of it at zero
+
+    A burst ends after a word (or line) boundary, after ``burst_size``
+    characters, or before a formatting toggle. The total time is unchanged;
+    it is only spent in one wait per burst instead of one per character.
+    """
+    boundary = BURST_BOUNDARIES[burst]
+    delays, offsets, text = plan.delays, plan.offsets, plan.text
+    pending = 0.0
+    count = 0
+    last = -1
+    for i in range(len(delays)):
+        offset = offsets[i]
+        if offset < 0:
+            if count:
+                delays[last] = pending
+                pending, count = 0.0, 0
+            continue
+        pending += delays[i]
+        delays[i] = 0.0
+        count += 1
+        last = i
+        if boundary(text[offset]) or count == burst_size:
+            delays[i] = pending
+            pending, count = 0.0, 0
+    if count:
+        delays[last] = pending
+
+
+def compile_plan(text: str, spans: Optional[Iterable[Tuple[int, int, int]]] = None,
+                 delay: float = 0.01, jitter: float = 0.0, burst: Optional[str] = None,
+                 burst_size: int = 0) -> KeystrokePlan:
+    """Compile text (and optional (start, end, flags) formatting spans) into a keystroke plan
+
+    All per-character decisions are made here: which key to send, when
+    to toggle formatting and how long to wait afterwards, so replaying the
+    plan needs no branching on the text. With ``burst`` set to ``"word"`` or
+    ``"line"``, each word or line (at most ``burst_size`` characters, if
+    set) is sent as one batch followed by a single wait.
+    """
+    plan = KeystrokePlan(text)
+    changes = _active_flags(spans, len(text)) if spans else []
+    change_index = 0
+    active = 0
+
+    def emit_toggles(new_flags: int):
+        switched = active ^ new_flags
+        for flag, letter in TOGGLE_KEYS:
+            if switched & flag:
+                plan._add(letter, MOD_CTRL, flag, TOGGLE_DELAY, -1)
+
+    for index, char in enumerate(text):
+        plan.char_events.append(len(plan.keys))
+        while change_index < len(changes) and changes[change_index][0] <= index:
+            new_flags = changes[change_index][1]
+            emit_toggles(new_flags)
+            active = new_flags
+            change_index += 1
+        char_delay = delay + jitter * (0.5 - random.random()) if jitter else delay
+        plan._add(SPECIAL_KEYS.get(char, char), 0, 0, max(0.0, char_delay), index)
+
+    if active:
+        emit_toggles(0)
+    if burst:
+        _batch_delays(plan, burst, burst_size)
+    return plan
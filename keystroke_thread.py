@@ -0,0 +1,144 @@
+import asyncio
+import queue
+import threading
+import time
+from typing import List, Tuple
+
+from models import TypingRate
+
+# Below this the thread spins instead of sleeping. Sleep overshoot is absorbed
+# by the next deadline, so a short spin is enough and keeps a core free
+SPIN_THRESHOLD = 0.00008
+
+# Falling further behind than this (a stall, or the coroutine side being
+# slow to send the next slice) restarts the schedule instead of bursting
+MAX_LAG = 0.05
+
+
+def _wait_until(deadline: float):
+    remaining = deadline - time.perf_counter()
+    if remaining > SPIN_THRESHOLD:
+        time.sleep(remaining - SPIN_THRESHOLD)
+    while time.perf_counter() < deadline:
+        pass
+
+
+class KeystrokeThread:
+    """Replay keystroke plans on a dedicated thread against absolute deadlines
+
+    Every event is due at the previous deadline plus its delay, measured
+    with ``perf_counter``, so timer overshoot on one key is absorbed by the
+    next wait instead of accumulating. The schedule carries over between
+    consecutive slices, so the round trip to the coroutine side between
+    slices does not slow typing down either. Events go out through an
+    ``input_backends.InputBackend``, which is only used from this thread.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._deadline = 0.0
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="keystrokes", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            plan, start, stop, scale, cancel, loop, future = job
+            try:
+                result = self._replay(plan, start, stop, scale, cancel)
+            except Exception as e:
+                loop.call_soon_threadsafe(_resolve, future, None, e)
+            else:
+                loop.call_soon_threadsafe(_resolve, future, result, None)
+
+    def _replay(self, plan, start: int, stop: int, scale: float,
+                cancel: threading.Event) -> Tuple[List[int], TypingRate]:
+        backend = self.backend
+        keys, modifiers, delays, offsets = plan.keys, plan.modifiers, plan.delays, plan.offsets
+        failed = []
+        chars = 0
+        requested = 0.0
+
+        # Elapsed time is measured from the wall clock for every slice; only
+        # the deadlines carry over from the previous one
+        began = time.perf_counter()
+        # Continue the previous schedule unless it has fallen too far behind
+        deadline = self._deadline if began - self._deadline < MAX_LAG else began
+
+        for i in range(start, stop):
+            if cancel.is_set():
+                break
+            key = keys[i]
+            try:
+                backend.send(key, modifiers[i])
+            except Exception as e:
+                offset = offsets[i]
+                print(f"Error typing event {i}: {str(e)}")
+                if offset >= 0:
+                    # Try alternative method for problematic characters
+                    try:
+                        backend.write(plan.text[offset])
+                    except Exception:
+                        print(f"Failed to type character '{plan.text[offset]}'")
+                        failed.append(offset)
+            if offsets[i] >= 0:
+                chars += 1
+
+            # Character delays follow the governor; toggle settle times do not
+            delay = delays[i] * scale if offsets[i] >= 0 else delays[i]
+            # Events due at the same moment go out together in one flush
+            if delay or i == stop - 1:
+                backend.flush()
+            requested += delay
+            deadline += delay
+            if not delay:
+                continue
+            if deadline - time.perf_counter() < -MAX_LAG:
+                deadline = time.perf_counter()
+            _wait_until(deadline)
+
+        self._deadline = deadline
+        rate = TypingRate(chars=chars, requested_seconds=requested, elapsed_seconds=time.perf_counter() - began)
+        return failed, rate
+
+    async def replay(self, plan, start: int = 0, stop: int = None,
+                     scale: float = 1.0) -> Tuple[List[int], TypingRate]:
+        """Replay events ``start:stop`` of a plan, returning the failed offsets and the rate
+
+        ``scale`` stretches or shrinks the character delays the plan was
+        compiled with.
+        """
+        stop = len(plan) if stop is None else stop
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        cancel = threading.Event()
+        self._ensure_started()
+        self._jobs.put((plan, start, stop, scale, cancel, loop, future))
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # Stop the thread from typing the rest of the slice
+            cancel.set()
+            raise
+
+    def stop(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._jobs.put(None)
+            self._thread.join()
+        self.backend.close()
+
+
+def _resolve(future: asyncio.Future, result, error):
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
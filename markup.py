@@ -0,0 +1,68 @@
+import re
+from typing import List, Tuple
+
+from document_parser import FORMAT_BOLD, FORMAT_ITALIC, FORMAT_UNDERLINE
+
+# ``__`` must be tried before ``_`` so underline is not read as two italics
+_MARKER_RE = re.compile(r'\*\*|__|_')
+
+MARKER_FLAGS = {'**': FORMAT_BOLD, '__': FORMAT_UNDERLINE, '_': FORMAT_ITALIC}
+
+
+def _italic_marker(text: str, start: int, end: int, closing: bool) -> bool:
+    """Whether a single ``_`` can open or close italics, so snake_case stays literal"""
+    before = text[start - 1] if start > 0 else ' '
+    after = text[end] if end < len(text) else ' '
+    if closing:
+        return not before.isspace() and not after.isalnum()
+    return not after.isspace() and not before.isalnum()
+
+
+def tokenize_markup(text: str) -> Tuple[str, List[Tuple[int, int, int]]]:
+    """Split ``**bold**``, ``__underline__`` and ``_italic_`` markup in one scan
+
+    Returns the text without its markers and the (start, end, flags) runs
+    covering it, plain runs included with flags 0. Markers without a
+    matching partner are kept as literal text.
+    """
+    markers = []
+    paired = set()
+    open_at = {}
+    for match in _MARKER_RE.finditer(text):
+        marker = match.group()
+        closing = marker in open_at
+        if marker == '_' and not _italic_marker(text, match.start(), match.end(), closing):
+            continue
+        if closing:
+            paired.add(open_at.pop(marker))
+            paired.add(len(markers))
+        else:
+            open_at[marker] = len(markers)
+        markers.append((match.start(), match.end(), marker))
+
+    parts = []
+    spans = []
+    length = 0
+    flags = 0
+    position = 0
+
+    def emit(segment: str):
+        nonlocal length
+        if not segment:
+            return
+        if spans and spans[-1][2] == flags:
+            spans[-1] = (spans[-1][0], length + len(segment), flags)
+        else:
+            spans.append((length, length + len(segment), flags))
+        parts.append(segment)
+        length += len(segment)
+
+    for index, (start, end, marker) in enumerate(markers):
+        if index not in paired:
+            continue
+        emit(text[position:start])
+        flags ^= MARKER_FLAGS[marker]
+        position = end
+    emit(text[position:])
+
+    return "".join(parts), spans
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List , Optional, Dict
+from typing import List , Optional, Dict, Tuple
 
 
 class DocumentContent(BaseModel):
@@ -10,3 +10,163 @@ class DocumentContent(BaseModel):
 class RetypedDocument(BaseModel):
     """Structure for the retyped document"""
     content: str = Field(description="The exact content of the document, retaining original formatting")
+
+
+class DocumentStats(BaseModel):
+    """Counts gathered while parsing a document"""
+    paragraphs: int = Field(0, description="Number of paragraphs (docx) or lines (text files)")
+    characters: int = Field(0, description="Number of characters of document text")
+    words: int = Field(0, description="Number of whitespace separated words")
+    tables: int = Field(0, description="Number of tables")
+    unit: str = Field("paragraphs", description="What the paragraphs count refers to")
+
+    @property
+    def summary(self) -> str:
+        return f"Document contains {self.paragraphs} {self.unit} and {self.characters} characters."
+
+
+class TextRun(BaseModel):
+    """A stretch of paragraph text sharing the same character formatting"""
+    text: str = ""
+    bold: bool = False
+    italic: bool = False
+    underline: bool = False
+
+
+class TableCell(BaseModel):
+    """A table cell stored once, with the grid area it spans"""
+    text: str = ""
+    row: int = 0
+    col: int = 0
+    row_span: int = 1
+    col_span: int = 1
+
+
+class DocumentBlock(BaseModel):
+    """A single body element of a document: paragraph, heading or table"""
+    kind: str = Field("paragraph", description="paragraph, heading or table")
+    text: str = Field("", description="Plain text of the block")
+    style: Optional[str] = Field(None, description="Style name of the block")
+    level: int = Field(0, description="Heading level, 0 for non headings")
+    runs: List[TextRun] = Field(default_factory=list, description="Formatted runs of paragraphs and headings")
+    rows: List[List[str]] = Field(default_factory=list, description="Cell texts for tables, one entry per grid column")
+    cells: List[TableCell] = Field(default_factory=list, description="Table cells with their spans")
+
+
+class ParsedDocument(BaseModel):
+    """An uploaded document parsed once and shared by every stage"""
+    hash: str = Field(description="SHA-256 of the uploaded bytes")
+    name: str = Field("", description="Original file name")
+    type: str = Field(description="File extension without the dot")
+    mime: Optional[str] = None
+    size: int = 0
+    encoding: Optional[str] = None
+    blocks: List[DocumentBlock] = Field(default_factory=list)
+    properties: Dict[str, Optional[str]] = Field(default_factory=dict, description="Core document properties")
+    headers: List[str] = Field(default_factory=list, description="Header text of each section")
+    footers: List[str] = Field(default_factory=list, description="Footer text of each section")
+    images: List[str] = Field(default_factory=list, description="Names of embedded images")
+    stats: DocumentStats = Field(default_factory=DocumentStats)
+    text: str = Field("", description="Normalized text ready for typing")
+
+    @property
+    def paragraphs(self) -> List[DocumentBlock]:
+        return [block for block in self.blocks if block.kind != "table"]
+
+    @property
+    def tables(self) -> List[DocumentBlock]:
+        return [block for block in self.blocks if block.kind == "table"]
+
+    @property
+    def styles(self) -> List[str]:
+        return sorted({block.style for block in self.blocks if block.style})
+
+    @property
+    def plain_text(self) -> str:
+        """Paragraph text joined by newlines, as shown in the preview"""
+        if not self.blocks:
+            return self.text
+        return "\n".join(block.text for block in self.paragraphs)
+
+
+class DocumentAnalysis(BaseModel):
+    """Formatting report of a document, built from its ParsedDocument"""
+    paragraphs: List[DocumentBlock] = Field(default_factory=list, description="Non-empty paragraphs with their styles")
+    tables: List[DocumentBlock] = Field(default_factory=list)
+    style_counts: Dict[str, int] = Field(default_factory=dict, description="Number of paragraphs per style")
+    properties: Dict[str, Optional[str]] = Field(default_factory=dict)
+    headers: List[str] = Field(default_factory=list)
+    footers: List[str] = Field(default_factory=list)
+    images: List[str] = Field(default_factory=list)
+
+
+
+class ImageEntry(BaseModel):
+    """An image embedded in a document package"""
+    name: str
+    member: str = Field(description="Path of the image inside the archive")
+    size: int = Field(0, description="Uncompressed size in bytes")
+    sha256: Optional[str] = None
+    path: Optional[str] = Field(None, description="Where the image was written, if extracted")
+    duplicate: bool = Field(False, description="True if an identical image was already stored")
+
+
+class ImageManifest(BaseModel):
+    """Images of a document and, after extraction, where they were stored"""
+    images: List[ImageEntry] = Field(default_factory=list)
+    skipped: List[str] = Field(default_factory=list, description="Images left out because of size limits")
+    total_bytes: int = 0
+
+    @property
+    def unique_count(self) -> int:
+        return sum(1 for image in self.images if not image.duplicate)
+
+
+class TypingArtifact(BaseModel):
+    """A document prepared ahead of time: normalized text plus formatting spans"""
+    source: str = Field(description="File name of the original document")
+    hash: str = Field(description="SHA-256 of the original document")
+    type: str
+    text: str = Field(description="Normalized text ready for typing")
+    spans: List[Tuple[int, int, int]] = Field(default_factory=list, description="(start, end, format flags) into text")
+    stats: DocumentStats = Field(default_factory=DocumentStats)
+
+
+class TypingRate(BaseModel):
+    """Requested versus achieved typing speed of a typing run"""
+    chars: int = 0
+    requested_seconds: float = Field(0.0, description="Sum of the delays the plan asked for")
+    elapsed_seconds: float = Field(0.0, description="Wall-clock time the keystroke thread actually took")
+
+    @property
+    def requested(self) -> float:
+        """Requested characters per second"""
+        return self.chars / self.requested_seconds if self.requested_seconds else 0.0
+
+    @property
+    def achieved(self) -> float:
+        """Achieved characters per second"""
+        return self.chars / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def add(self, other: "TypingRate"):
+        self.chars += other.chars
+        self.requested_seconds += other.requested_seconds
+        self.elapsed_seconds += other.elapsed_seconds
+
+
+class EditOperation(BaseModel):
+    """One step of an edit script turning typed text into the expected text"""
+    op: str = Field(description="insert, delete or replace")
+    position: int = Field(description="Offset in the typed text where the edit starts")
+    length: int = Field(0, description="Number of typed characters removed")
+    text: str = Field("", description="Expected characters put in their place")
+
+
+class TextComparison(BaseModel):
+    """Typed text compared against the expected text, from a single diff"""
+    similarity: float = Field(100.0, description="Characters kept by the diff as a percentage, computed like SequenceMatcher.ratio() * 100")
+    operations: List[EditOperation] = Field(default_factory=list, description="Edit script turning the typed text into the expected text")
+
+    @property
+    def matches(self) -> bool:
+        return not self.operations
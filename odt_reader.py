@@ -0,0 +1,312 @@
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from docx_reader import heading_level
+from models import DocumentBlock, TextRun
+from table_grid import TableGrid
+
+OFFICE = "{urn:oasis:names:tc:opendocument:xmlns:office:1.0}"
+TEXT = "{urn:oasis:names:tc:opendocument:xmlns:text:1.0}"
+TABLE = "{urn:oasis:names:tc:opendocument:xmlns:table:1.0}"
+STYLE = "{urn:oasis:names:tc:opendocument:xmlns:style:1.0}"
+FO = "{urn:oasis:names:tc:opendocument:xmlns:xsl-fo-compatible:1.0}"
+META = "{urn:oasis:names:tc:opendocument:xmlns:meta:1.0}"
+DC = "{http://purl.org/dc/elements/1.1/}"
+
+CONTENT_PART = "content.xml"
+STYLES_PART = "styles.xml"
+META_PART = "meta.xml"
+MEDIA_PREFIX = "Pictures/"
+
+# (bold, italic, underline); None means "inherit from the enclosing element"
+Format = Tuple[Optional[bool], Optional[bool], Optional[bool]]
+_PLAIN: Format = (False, False, False)
+
+# Inline elements whose content is not part of the running text
+_SKIPPED_INLINE = (TEXT + "note", OFFICE + "annotation", TEXT + "bookmark-ref")
+
+
+def _text_format(style: ET.Element) -> Format:
+    props = style.find(STYLE + "text-properties")
+    if props is None:
+        return (None, None, None)
+    weight = props.get(FO + "font-weight")
+    slant = props.get(FO + "font-style")
+    underline = props.get(STYLE + "text-underline-style")
+    return (
+        None if weight is None else weight == "bold" or weight.isdigit() and int(weight) >= 600,
+        None if slant is None else slant in ("italic", "oblique"),
+        None if underline is None else underline != "none",
+    )
+
+
+def _merge(specified: Format, inherited: Format) -> Format:
+    return tuple(s if s is not None else i for s, i in zip(specified, inherited))
+
+
+class _Styles:
+    """Display names and character formats of the styles an ODT refers to"""
+
+    def __init__(self):
+        self.names: Dict[str, str] = {}
+        self.formats: Dict[str, Format] = {}
+
+    def add(self, root: ET.Element):
+        for style in root.iter(STYLE + "style"):
+            name = style.get(STYLE + "name")
+            parent = style.get(STYLE + "parent-style-name")
+            # Automatic styles like "P1" are shown under the name of their parent style
+            display = style.get(STYLE + "display-name") or self.names.get(parent) or parent or name
+            self.names[name] = display
+            fmt = _text_format(style)
+            if parent in self.formats:
+                fmt = _merge(fmt, self.formats[parent])
+            self.formats[name] = fmt
+
+    def format_of(self, name: Optional[str], inherited: Format) -> Format:
+        return _merge(self.formats.get(name, (None, None, None)), inherited)
+
+
+def _append(runs: List[TextRun], text: Optional[str], fmt: Format):
+    if not text:
+        return
+    bold, italic, underline = (bool(flag) for flag in fmt)
+    if runs and (runs[-1].bold, runs[-1].italic, runs[-1].underline) == (bold, italic, underline):
+        runs[-1].text += text
+    else:
+        runs.append(TextRun(text=text, bold=bold, italic=italic, underline=underline))
+
+
+def _collect_runs(element: ET.Element, styles: _Styles, fmt: Format, runs: List[TextRun]):
+    _append(runs, element.text, fmt)
+    for child in element:
+        tag = child.tag
+        if tag == TEXT + "s":
+            _append(runs, " " * int(child.get(TEXT + "c", "1")), fmt)
+        elif tag == TEXT + "tab":
+            _append(runs, "\t", fmt)
+        elif tag == TEXT + "line-break":
+            _append(runs, "\n", fmt)
+        elif tag == TEXT + "span":
+            _collect_runs(child, styles, styles.format_of(child.get(TEXT + "style-name"), fmt), runs)
+        elif tag not in _SKIPPED_INLINE:
+            _collect_runs(child, styles, fmt, runs)
+        _append(runs, child.tail, fmt)
+
+
+def paragraph_text(paragraph: ET.Element) -> str:
+    """Plain text of a text:p or text:h element"""
+    runs = []
+    _collect_runs(paragraph, _Styles(), _PLAIN, runs)
+    return "".join(run.text for run in runs)
+
+
+def _paragraph_block(paragraph: ET.Element, styles: _Styles) -> DocumentBlock:
+    style_name = paragraph.get(TEXT + "style-name")
+    style = styles.names.get(style_name, style_name)
+    level = 0
+    if paragraph.tag == TEXT + "h":
+        level = int(paragraph.get(TEXT + "outline-level", "1"))
+        if not heading_level(style):
+            style = f"Heading {level}"
+    runs = []
+    _collect_runs(paragraph, styles, styles.format_of(style_name, _PLAIN), runs)
+    return DocumentBlock(
+        kind="heading" if level else "paragraph",
+        text="".join(run.text for run in runs),
+        style=style,
+        level=level,
+        runs=runs,
+    )
+
+
+# Elements that group table rows without being rows themselves
+_ROW_GROUPS = (TABLE + "table-header-rows", TABLE + "table-rows", TABLE + "table-row-group")
+# Elements inside a cell whose paragraphs are part of the cell text
+_CELL_CONTAINERS = (TEXT + "list", TEXT + "list-item", TEXT + "list-header", TEXT + "section")
+
+
+def _table_rows(table: ET.Element) -> Iterator[ET.Element]:
+    """The rows of a table itself, not those of tables nested in its cells"""
+    for child in table:
+        if child.tag == TABLE + "table-row":
+            yield child
+        elif child.tag in _ROW_GROUPS:
+            yield from _table_rows(child)
+
+
+def _cell_paragraphs(element: ET.Element) -> Iterator[ET.Element]:
+    """The paragraphs of a cell, leaving out those of nested tables"""
+    for child in element:
+        if child.tag in (TEXT + "p", TEXT + "h"):
+            yield child
+        elif child.tag in _CELL_CONTAINERS:
+            yield from _cell_paragraphs(child)
+
+
+def _row_cells(row: ET.Element) -> List[Tuple[str, int, int, int]]:
+    """(text, column span, row span, repeat) of each cell; a covered cell has a column span of 0"""
+    cells = []
+    for cell in row:
+        repeat = int(cell.get(TABLE + "number-columns-repeated", "1"))
+        if cell.tag == TABLE + "covered-table-cell":
+            cells.append(("", 0, 1, repeat))
+        elif cell.tag == TABLE + "table-cell":
+            text = "\n".join(paragraph_text(p) for p in _cell_paragraphs(cell)).strip()
+            col_span = int(cell.get(TABLE + "number-columns-spanned", "1"))
+            row_span = int(cell.get(TABLE + "number-rows-spanned", "1"))
+            cells.append((text, col_span, row_span, repeat))
+    return cells
+
+
+def _table_block(table: ET.Element) -> DocumentBlock:
+    grid = TableGrid()
+    # Filler rows and cells are often written as one empty element repeated
+    # hundreds of times, so empty ones are only added once a later row or
+    # cell shows they sit inside the table
+    empty_rows = 0
+    for row in _table_rows(table):
+        cells = _row_cells(row)
+        repeat = int(row.get(TABLE + "number-rows-repeated", "1"))
+        if all(not text and col_span == 1 and row_span == 1 for text, col_span, row_span, _ in cells):
+            empty_rows += repeat
+            continue
+        for _ in range(empty_rows):
+            grid.start_row()
+        empty_rows = 0
+        for _ in range(repeat):
+            _add_row(grid, cells)
+    return grid.block(trim=True)
+
+
+def _add_row(grid: TableGrid, cells: List[Tuple[str, int, int, int]]):
+    grid.start_row()
+    pending = []
+    for text, col_span, row_span, repeat in cells:
+        if not col_span:
+            _add_pending(grid, pending)
+            for _ in range(repeat):
+                grid.add_covered()
+        elif not text and col_span == 1 and row_span == 1:
+            pending.append(repeat)
+        else:
+            _add_pending(grid, pending)
+            for _ in range(repeat):
+                grid.add_cell(text, col_span, row_span)
+
+
+def _add_pending(grid: TableGrid, pending: List[int]):
+    """Add the empty cells held back in ``pending`` and clear it"""
+    for repeat in pending:
+        for _ in range(repeat):
+            grid.add_cell("")
+    pending.clear()
+
+
+def _element_blocks(element: ET.Element, styles: _Styles) -> Iterator[DocumentBlock]:
+    """Blocks of a body element; lists and sections are flattened into their paragraphs"""
+    if element.tag in (TEXT + "p", TEXT + "h"):
+        yield _paragraph_block(element, styles)
+    elif element.tag == TABLE + "table":
+        yield _table_block(element)
+    elif element.tag in (TEXT + "list", TEXT + "list-item", TEXT + "list-header", TEXT + "section"):
+        for child in element:
+            yield from _element_blocks(child, styles)
+
+
+def read_styles(archive: zipfile.ZipFile) -> _Styles:
+    """Read the named styles of styles.xml"""
+    styles = _Styles()
+    if STYLES_PART in archive.namelist():
+        with archive.open(STYLES_PART) as part:
+            root = ET.parse(part).getroot()
+        office_styles = root.find(OFFICE + "styles")
+        if office_styles is not None:
+            styles.add(office_styles)
+    return styles
+
+
+def iter_archive_blocks(archive: zipfile.ZipFile) -> Iterator[DocumentBlock]:
+    """Yield body blocks from an already opened .odt archive"""
+    styles = read_styles(archive)
+    with archive.open(CONTENT_PART) as part:
+        depth = 0
+        body_text = None
+        for event, element in ET.iterparse(part, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if depth == 3 and element.tag == OFFICE + "text":
+                    body_text = element
+                continue
+
+            depth -= 1
+            if depth == 1 and element.tag == OFFICE + "automatic-styles":
+                styles.add(element)
+                continue
+            # document-content > body > text > top level paragraph, heading, list or table
+            if depth != 3 or body_text is None:
+                continue
+            yield from _element_blocks(element, styles)
+            body_text.clear()
+
+
+def iter_odt_blocks(source) -> Iterator[DocumentBlock]:
+    """Yield the paragraphs, headings and tables of an .odt in body order while it is being read
+
+    ``source`` is a path or a binary file object. ``content.xml`` is parsed
+    incrementally in the same way ``docx_reader`` handles ``document.xml``.
+    """
+    with zipfile.ZipFile(source) as archive:
+        yield from iter_archive_blocks(archive)
+
+
+def read_core_properties(archive: zipfile.ZipFile) -> Dict[str, Optional[str]]:
+    """Read author and dates from meta.xml"""
+    properties = {"author": None, "created": None, "modified": None}
+    if META_PART not in archive.namelist():
+        return properties
+    with archive.open(META_PART) as part:
+        root = ET.parse(part).getroot()
+    tags = {"author": (DC + "creator", META + "initial-creator"),
+            "created": (META + "creation-date",),
+            "modified": (DC + "date",)}
+    for key, candidates in tags.items():
+        for tag in candidates:
+            element = root.find(f"{OFFICE}meta/{tag}")
+            if element is not None and element.text:
+                value = element.text.strip()
+                if key != "author":
+                    try:
+                        value = str(datetime.fromisoformat(value.replace("Z", "+00:00")))
+                    except ValueError:
+                        pass
+                properties[key] = value
+                break
+    return properties
+
+
+def read_headers_and_footers(archive: zipfile.ZipFile) -> Tuple[List[str], List[str]]:
+    """Return the non-empty header and footer texts of the master pages"""
+    headers, footers = [], []
+    if STYLES_PART not in archive.namelist():
+        return headers, footers
+    with archive.open(STYLES_PART) as part:
+        root = ET.parse(part).getroot()
+    for page in root.iter(STYLE + "master-page"):
+        for tag, found in ((STYLE + "header", headers), (STYLE + "footer", footers)):
+            element = page.find(tag)
+            if element is None:
+                continue
+            text = "\n".join(t for t in (paragraph_text(p) for p in element.iter(TEXT + "p")) if t.strip())
+            if text:
+                found.append(text)
+    return headers, footers
+
+
+def list_media(archive: zipfile.ZipFile) -> List[str]:
+    """Return the file names of the images stored in Pictures/"""
+    return [posixpath.basename(name) for name in archive.namelist()
+            if name.startswith(MEDIA_PREFIX) and not name.endswith("/")]
@@ -0,0 +1,68 @@
+import io
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+from pypdf import PdfReader
+
+from models import DocumentBlock
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PAGES_PER_TASK = 8
+
+# Each worker process opens the PDF once and keeps only the reader around;
+# pages are extracted to plain strings and nothing else is sent back.
+_worker_reader = None
+
+
+def _init_worker(data: bytes):
+    global _worker_reader
+    _worker_reader = PdfReader(io.BytesIO(data))
+
+
+def _normalize(text: str) -> str:
+    return "\n".join(line.rstrip() for line in text.splitlines()).strip()
+
+
+def _extract_range(reader: PdfReader, start: int, stop: int) -> List[str]:
+    texts = []
+    for index in range(start, stop):
+        texts.append(_normalize(reader.pages[index].extract_text() or ""))
+    return texts
+
+
+def _extract_range_in_worker(page_range) -> List[str]:
+    return _extract_range(_worker_reader, *page_range)
+
+
+def iter_pdf_pages(data: bytes, workers: Optional[int] = None, pages_per_task: int = PAGES_PER_TASK) -> Iterator[str]:
+    """Yield the text of every page of a PDF in order
+
+    Pages are extracted in batches by a process pool; results are yielded in
+    page order as soon as each batch is done, so the first pages can be used
+    while later ones are still being extracted.
+    """
+    reader = PdfReader(io.BytesIO(data))
+    page_count = len(reader.pages)
+    workers = workers or os.cpu_count() or 1
+
+    if page_count <= pages_per_task or workers == 1:
+        for start in range(0, page_count, pages_per_task):
+            yield from _extract_range(reader, start, min(start + pages_per_task, page_count))
+        return
+
+    ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+    logger.info(f"Extracting {page_count} PDF pages with {workers} workers")
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges)),
+                             initializer=_init_worker, initargs=(data,)) as executor:
+        for texts in executor.map(_extract_range_in_worker, ranges):
+            yield from texts
+
+
+def iter_pdf_blocks(data: bytes, workers: Optional[int] = None) -> Iterator[DocumentBlock]:
+    """Yield one paragraph block per PDF page, in page order"""
+    for text in iter_pdf_pages(data, workers):
+        yield DocumentBlock(kind="paragraph", text=text)
@@ -0,0 +1,77 @@
+from typing import Dict, List, Optional, Tuple
+
+from models import DocumentBlock, TableCell
+
+
+class TableGrid:
+    """Resolve merged table cells into a compact grid in a single pass
+
+    Readers feed cells row by row as they walk the table XML. Each real cell
+    is stored once with its row and column span; positions covered by a
+    merge stay empty in the row texts, so a merged cell is typed only once.
+    """
+
+    def __init__(self):
+        self.cells: List[TableCell] = []
+        self.rows: List[List[str]] = []
+        self._covering: Dict[Tuple[int, int], TableCell] = {}
+        self._col = 0
+
+    @property
+    def _row(self) -> int:
+        return len(self.rows) - 1
+
+    def start_row(self, skip: int = 0):
+        """Begin a new row, leaving ``skip`` leading grid columns empty"""
+        self.rows.append([""] * skip)
+        self._col = skip
+
+    def _place(self, cell: TableCell, first_row: int):
+        for row in range(first_row, cell.row + cell.row_span):
+            for col in range(cell.col, cell.col + cell.col_span):
+                self._covering[(row, col)] = cell
+
+    def _fill(self, text: str, width: int):
+        self.rows[-1].append(text)
+        self.rows[-1].extend([""] * (width - 1))
+        self._col += width
+
+    def add_cell(self, text: str, col_span: int = 1, row_span: int = 1) -> TableCell:
+        """Add a cell that starts at the current position"""
+        cell = TableCell(text=text, row=self._row, col=self._col, row_span=row_span, col_span=col_span)
+        self.cells.append(cell)
+        self._place(cell, cell.row)
+        self._fill(text, col_span)
+        return cell
+
+    def continue_cell(self, col_span: int = 1) -> TableCell:
+        """Extend the cell above downwards (a .docx ``vMerge`` continuation)"""
+        above = self._covering.get((self._row - 1, self._col))
+        if above is None:
+            return self.add_cell("", col_span)
+        above.row_span = self._row - above.row + 1
+        self._place(above, self._row)
+        self._fill("", col_span)
+        return above
+
+    def add_covered(self) -> Optional[TableCell]:
+        """Step over a position already covered by a declared span (an ODT ``covered-table-cell``)"""
+        cell = self._covering.get((self._row, self._col))
+        self._fill("", 1)
+        return cell
+
+    def block(self, trim: bool = False) -> DocumentBlock:
+        """Build the table block; ``trim`` drops trailing empty columns of each row"""
+        if trim:
+            for row in self.rows:
+                while row and not row[-1]:
+                    row.pop()
+        row_texts = [[] for _ in self.rows]
+        for cell in self.cells:
+            row_texts[cell.row].append(cell.text)
+        return DocumentBlock(
+            kind="table",
+            rows=self.rows,
+            cells=self.cells,
+            text="\n".join("\t".join(texts) for texts in row_texts),
+        )
@@ -0,0 +1,10 @@
+from batch_prepare import prepare_document
+from document_parser import FORMAT_BOLD, FORMAT_ITALIC
+
+
+def test_markup_in_text_documents_becomes_formatting(tmp_path):
+    path = tmp_path / "notes.md"
+    path.write_text("Some **bold** and _it_ text, snake_case.\n", encoding="utf-8")
+    artifact = prepare_document(str(path))
+    assert artifact.text.startswith("Some bold and it text, snake_case.")
+    assert artifact.spans == [(5, 9, FORMAT_BOLD), (14, 16, FORMAT_ITALIC)]
@@ -0,0 +1,72 @@
+import random
+import string
+import time
+
+from diff_engine import _Budget, diff_opcodes, myers_opcodes
+
+
+def _apply(original, typed, operations):
+    """Rebuild ``typed`` from ``original`` and the non-equal regions"""
+    pieces = []
+    position = 0
+    for _, a0, a1, b0, b1 in operations:
+        pieces.append(original[position:a0])
+        pieces.append(typed[b0:b1])
+        position = a1
+    pieces.append(original[position:])
+    return "".join(pieces)
+
+
+def _lcs(a, b):
+    row = [0] * (len(b) + 1)
+    for char in a:
+        previous = 0
+        for j, other in enumerate(b, 1):
+            previous, row[j] = row[j], previous + 1 if char == other else max(row[j], row[j - 1])
+    return row[-1]
+
+
+def _lines(size, seed):
+    generator = random.Random(seed)
+    lines = []
+    while sum(map(len, lines)) < size:
+        width = generator.randint(20, 80)
+        lines.append("".join(generator.choice(string.ascii_lowercase + "  ") for _ in range(width)) + "\n")
+    return "".join(lines)[:size]
+
+
+def test_opcodes_rebuild_the_typed_text_with_a_minimal_diff():
+    generator = random.Random(0)
+    for _ in range(500):
+        a = "".join(generator.choice("ab\n") for _ in range(generator.randint(0, 25)))
+        b = "".join(generator.choice("ab\n") for _ in range(generator.randint(0, 25)))
+        operations = myers_opcodes(a, b)
+        assert _apply(a, b, operations) == b
+        kept = len(a) - sum(a1 - a0 for _, a0, a1, _, _ in operations)
+        assert kept == _lcs(a, b)
+        assert _apply(a, b, diff_opcodes(a, b)) == b
+
+
+def test_scattered_typos_in_a_long_text_are_found_exactly():
+    original = _lines(200_000, 1)
+    typed = list(original)
+    for index in random.Random(2).sample(range(len(typed)), 200):
+        typed[index] = "#"
+    operations = diff_opcodes(original, "".join(typed))
+    assert len(operations) == 200
+    assert all(tag == "replace" and a1 - a0 == 1 for tag, a0, a1, _, _ in operations)
+
+
+def test_budget_is_shared_across_bisections():
+    budget = _Budget(100)
+    operations = myers_opcodes("abcdefghij" * 20, "jihgfedcba" * 20, budget)
+    assert budget.steps == 0
+    assert _apply("abcdefghij" * 20, "jihgfedcba" * 20, operations) == "jihgfedcba" * 20
+
+
+def test_unrelated_texts_are_diffed_in_bounded_time():
+    original, typed = _lines(200_000, 3), _lines(200_000, 4)
+    began = time.perf_counter()
+    operations = diff_opcodes(original, typed)
+    assert time.perf_counter() - began < 2.0
+    assert _apply(original, typed, operations) == typed
@@ -0,0 +1,54 @@
+from document_verifier import DocumentVerifier
+
+TEXT = "hello world\nsecond line\nthird"
+
+
+def test_clean_windows_are_confirmed_once():
+    verifier = DocumentVerifier()
+    verifier.begin(TEXT)
+    assert verifier.checkpoint(0, "hello world\n")["match"]
+    assert verifier.checkpoint(12, "second line\n")["match"]
+    # Recording the same window again leaves the verified prefix alone
+    verifier.confirm(12, "second line\n")
+    assert verifier.verified == 24
+    assert verifier.verify_document(TEXT)["match"]
+    assert not verifier.verify_document(TEXT[:-1])["match"]
+
+
+def test_corrected_window_does_not_hide_a_truncated_line():
+    verifier = DocumentVerifier()
+    verifier.begin(TEXT)
+    comparison = verifier.checkpoint(0, "hello wrld\n")
+    assert not comparison["match"]
+    assert comparison["errors"][0]["position"] == 8
+    verifier.confirm(0, "hello world\n")
+
+    comparison = verifier.verify_document("rld\nsecond line\nthird")
+    assert not comparison["match"]
+    assert comparison["errors"][0]["line"] == 1
+
+
+def test_final_pass_reports_lines_past_the_verified_prefix():
+    verifier = DocumentVerifier()
+    verifier.begin(TEXT)
+    assert verifier.checkpoint(0, "hello world\nsec")["match"]
+    comparison = verifier.verify_document("hello world\nsecond lime\nthird")
+    assert comparison["errors"] == [{
+        "type": "content_mismatch",
+        "line": 2,
+        "position": 10,
+        "original": "second line",
+        "typed": "second lime",
+    }]
+
+
+def test_window_missing_its_last_character_is_a_mismatch():
+    verifier = DocumentVerifier()
+    verifier.begin(TEXT)
+    comparison = verifier.checkpoint(0, "hello worl", 11)
+    assert not comparison["match"]
+    assert comparison["errors"][0]["position"] == 11
+    assert verifier.verified == 0
+    verifier.confirm(0, "hello world")
+    assert verifier.checkpoint(11, "\nsecond", 18)["match"]
+    assert verifier.verified == 18
@@ -0,0 +1,47 @@
+import io
+import zipfile
+
+from docx_reader import iter_docx_blocks
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+MC_NS = "http://schemas.openxmlformats.org/markup-compatibility/2006"
+WPS_NS = "http://schemas.microsoft.com/office/word/2010/wordprocessingShape"
+V_NS = "urn:schemas-microsoft-com:vml"
+
+
+def _docx(body: str) -> io.BytesIO:
+    document = (
+        f'<w:document xmlns:w="{W_NS}" xmlns:mc="{MC_NS}" xmlns:wps="{WPS_NS}" xmlns:v="{V_NS}">'
+        f'<w:body>{body}</w:body></w:document>'
+    )
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w") as archive:
+        archive.writestr("word/document.xml", document)
+    data.seek(0)
+    return data
+
+
+def _text_box(text: str) -> str:
+    content = f'<w:txbxContent><w:p><w:r><w:t>{text}</w:t></w:r></w:p></w:txbxContent>'
+    return (
+        '<w:r><mc:AlternateContent>'
+        f'<mc:Choice Requires="wps"><w:drawing><wps:txbx>{content}</wps:txbx></w:drawing></mc:Choice>'
+        f'<mc:Fallback><w:pict><v:shape><v:textbox>{content}</v:textbox></v:shape></w:pict></mc:Fallback>'
+        '</mc:AlternateContent></w:r>'
+    )
+
+
+def test_text_box_is_not_part_of_the_paragraph_text():
+    body = f'<w:p><w:r><w:t xml:space="preserve">Body </w:t></w:r>{_text_box("BOX")}<w:r><w:t>end</w:t></w:r></w:p>'
+    blocks = list(iter_docx_blocks(_docx(body)))
+    assert [block.text for block in blocks] == ["Body end"]
+
+
+def test_hyperlink_and_inserted_runs_are_kept_in_order():
+    body = (
+        '<w:p><w:r><w:t xml:space="preserve">See </w:t></w:r>'
+        '<w:hyperlink><w:r><w:t>the link</w:t></w:r></w:hyperlink>'
+        '<w:ins><w:r><w:t xml:space="preserve"> now</w:t></w:r></w:ins></w:p>'
+    )
+    blocks = list(iter_docx_blocks(_docx(body)))
+    assert [block.text for block in blocks] == ["See the link now"]
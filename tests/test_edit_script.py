@@ -0,0 +1,41 @@
+import difflib
+import random
+import string
+
+from edit_script import compare_texts
+
+
+def _mistype(text, generator):
+    chars = list(text)
+    for _ in range(generator.randint(0, 10)):
+        if not chars:
+            break
+        index = generator.randrange(len(chars))
+        roll = generator.random()
+        if roll < 0.33:
+            del chars[index]
+        elif roll < 0.66:
+            chars.insert(index, generator.choice(string.ascii_lowercase + "\n"))
+        else:
+            chars[index] = generator.choice(string.ascii_lowercase + "\n ")
+    return "".join(chars)
+
+
+def test_line_retyped_across_a_blank_line_still_matches_by_character():
+    expected = "vlq\nv gdz dwahtf m dntej rvm\nquaiz "
+    actual = "vlqv gdz dwatf m dtebj rvm\n\nquaiz"
+    ratio = difflib.SequenceMatcher(None, actual, expected, autojunk=False).ratio()
+    assert compare_texts(expected, actual).similarity >= ratio * 100 - 1e-9
+
+
+def test_similarity_is_not_below_sequence_matcher_ratio():
+    generator = random.Random(0)
+    for _ in range(2000):
+        words = ("".join(generator.choice(string.ascii_lowercase) for _ in range(generator.randint(1, 7)))
+                 for _ in range(generator.randint(1, 30)))
+        expected = "".join(word + generator.choice("  \n") for word in words)
+        actual = _mistype(expected, generator)
+        comparison = compare_texts(expected, actual)
+        ratio = difflib.SequenceMatcher(None, actual, expected, autojunk=False).ratio()
+        assert comparison.similarity >= ratio * 100 - 1e-9
+        assert comparison.matches == (expected == actual)
@@ -0,0 +1,71 @@
+import io
+import zipfile
+
+from odt_reader import iter_odt_blocks
+
+NAMESPACES = (
+    'xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+    'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" '
+    'xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"'
+)
+
+
+def _odt(body: str) -> io.BytesIO:
+    content = (
+        f'<office:document-content {NAMESPACES}><office:body><office:text>'
+        f'{body}</office:text></office:body></office:document-content>'
+    )
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w") as archive:
+        archive.writestr("content.xml", content)
+    data.seek(0)
+    return data
+
+
+def _cell(text: str = "", repeat: int = 1) -> str:
+    repeated = f' table:number-columns-repeated="{repeat}"' if repeat > 1 else ""
+    content = f"<text:p>{text}</text:p>" if text else ""
+    return f"<table:table-cell{repeated}>{content}</table:table-cell>"
+
+
+def test_repeated_empty_cells_inside_a_row_keep_columns_aligned():
+    body = (
+        "<table:table>"
+        f"<table:table-row>{_cell('A')}{_cell(repeat=2)}{_cell('B')}{_cell(repeat=1000)}</table:table-row>"
+        f"<table:table-row>{_cell('C')}{_cell('D')}{_cell('E')}{_cell('F')}{_cell(repeat=1000)}</table:table-row>"
+        "</table:table>"
+    )
+    (table,) = iter_odt_blocks(_odt(body))
+    assert table.rows == [["A", "", "", "B"], ["C", "D", "E", "F"]]
+    # The trailing filler is dropped rather than stored as a thousand cells
+    assert len(table.cells) == 8
+
+
+def test_nested_tables_stay_inside_their_cell():
+    inner = (
+        "<table:table>"
+        f"<table:table-row>{_cell('x')}</table:table-row>"
+        f"<table:table-row>{_cell('y')}</table:table-row>"
+        "</table:table>"
+    )
+    body = (
+        "<table:table>"
+        f"<table:table-header-rows><table:table-row><table:table-cell><text:p>A</text:p>{inner}"
+        f"</table:table-cell>{_cell('B')}</table:table-row></table:table-header-rows>"
+        f"<table:table-row>{_cell('C')}{_cell('D')}</table:table-row>"
+        "</table:table>"
+    )
+    (table,) = iter_odt_blocks(_odt(body))
+    assert table.rows == [["A", "B"], ["C", "D"]]
+
+
+def test_repeated_rows_are_expanded():
+    body = (
+        "<table:table>"
+        f'<table:table-row table:number-rows-repeated="3">{_cell("A")}{_cell("B")}</table:table-row>'
+        f"<table:table-row>{_cell('C')}</table:table-row>"
+        f'<table:table-row table:number-rows-repeated="1000">{_cell(repeat=2)}</table:table-row>'
+        "</table:table>"
+    )
+    (table,) = iter_odt_blocks(_odt(body))
+    assert table.rows == [["A", "B"], ["A", "B"], ["A", "B"], ["C"]]
@@ -0,0 +1,24 @@
+from models import TypingRate
+from throughput_governor import MIN_DELAY_FACTOR, ThroughputGovernor
+
+
+def test_clean_checkpoints_speed_up_past_the_starting_delay():
+    governor = ThroughputGovernor(0.01, 100)
+    for _ in range(200):
+        governor.record(0)
+    assert governor.delay == 0.01 * MIN_DELAY_FACTOR
+    assert governor.scale == MIN_DELAY_FACTOR
+
+
+def test_errors_back_off_and_check_more_often():
+    governor = ThroughputGovernor(0.01, 100)
+    governor.record(3)
+    assert governor.delay == 0.02
+    assert governor.verify_interval == 50
+    assert governor.failed_checkpoints == 1
+
+
+def test_no_speed_up_while_typing_falls_behind():
+    governor = ThroughputGovernor(0.01, 100)
+    governor.record(0, TypingRate(chars=100, requested_seconds=1.0, elapsed_seconds=2.0))
+    assert governor.delay == 0.01
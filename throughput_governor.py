@@ -0,0 +1,61 @@
+from models import TypingRate
+
+# Verification interval bounds, in characters
+MIN_INTERVAL = 20
+MAX_INTERVAL = 1000
+
+# Additive increase per clean checkpoint, as a fraction of the starting rate
+RATE_STEP = 0.1
+# Multiplicative decrease of the rate after a checkpoint with errors
+BACKOFF = 0.5
+INTERVAL_STEP = 25
+
+# Only speed up while the keystroke thread keeps up with what is asked of it
+KEEP_UP = 0.9
+# Shortest delay the governor may reach by default, as a fraction of the starting delay
+MIN_DELAY_FACTOR = 0.25
+
+
+class ThroughputGovernor:
+    """Additive-increase, multiplicative-decrease control of the typing speed
+
+    Every clean verification checkpoint raises the keystroke rate a step and
+    spaces checkpoints further apart; a checkpoint with errors halves the
+    rate and checks twice as often. Fed with mismatches between the text
+    and what the editor shows, the delay therefore settles just under the
+    fastest rate the editor takes without dropping keys.
+
+    The delay stays between ``min_delay`` (by default MIN_DELAY_FACTOR of
+    the starting delay) and ``max_delay``.
+    """
+
+    def __init__(self, delay: float, verify_interval: int, min_delay: float = None,
+                 max_delay: float = None):
+        self.base_delay = delay
+        self.delay = delay
+        self.verify_interval = verify_interval
+        self.min_delay = delay * MIN_DELAY_FACTOR if min_delay is None else min(min_delay, delay)
+        self.max_delay = max_delay or max(delay * 4, 0.05)
+        self._rate_step = RATE_STEP / delay if delay else 0.0
+        self.clean_checkpoints = 0
+        self.failed_checkpoints = 0
+
+    @property
+    def scale(self) -> float:
+        """Factor to apply to delays that were compiled at ``base_delay``"""
+        return self.delay / self.base_delay if self.base_delay else 1.0
+
+    def record(self, errors: int, rate: TypingRate = None):
+        """Adjust the delay and interval after a checkpoint that found ``errors`` mismatches"""
+        if errors:
+            self.failed_checkpoints += 1
+            self.delay = min(self.max_delay, self.delay / BACKOFF)
+            self.verify_interval = max(MIN_INTERVAL, self.verify_interval // 2)
+            return
+
+        self.clean_checkpoints += 1
+        self.verify_interval = min(MAX_INTERVAL, self.verify_interval + INTERVAL_STEP)
+        if rate is not None and rate.achieved < KEEP_UP * rate.requested:
+            return
+        if self._rate_step:
+            self.delay = max(self.min_delay, 1.0 / (1.0 / self.delay + self._rate_step))
@@ -2,21 +2,34 @@
 import os
 import time
 import sys
-import asyncio
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict
 import re
 from pydantic import BaseModel, Field
 from pydantic_ai import Agent
 from dotenv import load_dotenv
 import traceback
-import random
-from pynput.keyboard import Key, Controller as KeyboardController
-from pynput.mouse import Button, Controller as MouseController
-import keyboard
+from pynput.keyboard import Controller as KeyboardController
+from pynput.mouse import Controller as MouseController
 import language_tool_python
+from clipboard_watch import ClipboardReader
+from document_verifier import DocumentVerifier
+from document_parser import FORMAT_BOLD, FORMAT_ITALIC, FORMAT_UNDERLINE, load_document
+from edit_script import edit_script
+from input_backends import select_backend
+from input_driver import InputDriver
+from keystroke_plan import compile_plan
+from keystroke_thread import KeystrokeThread
+from markup import tokenize_markup
+from models import DocumentStats, ParsedDocument, TypingArtifact, TypingRate
+from throughput_governor import ThroughputGovernor
 
 load_dotenv()
 
+# Characters typed between two progress updates when replaying a plan
+PROGRESS_INTERVAL = 5
+# Longest wait for the editor to put its text on the clipboard when read back
+READBACK_TIMEOUT = 2.0
+
 # Initialize language tool for grammar checking
 try:
     language_tool = language_tool_python.LanguageTool('en-US')
@@ -75,192 +88,166 @@ class RetypedDocument(BaseModel):
     """Structure for the retyped document"""
     content: str = Field(description="The exact content of the document, retaining original formatting")
 
-class DocumentVerifier:
-    """Class to verify document content and detect errors"""
+class TypedMirror:
+    """Append-only record of the text typed so far
+
+    Chunks are only ever appended, and the cursor line and column are
+    advanced from each new chunk alone, so keeping the mirror up to date
+    costs the same per character however long the document gets.
+    """
     def __init__(self):
-        pass
+        self._chunks = []
+        self.cursor = 0
+        self.line = 0
+        self.column = 0
     
-    def compare_content(self, original: str, typed: str) -> Dict[str, Any]:
-        """Compare original content with typed content to detect errors"""
-        # Split into lines for comparison
-        original_lines = original.split('\n')
-        typed_lines = typed.split('\n')
-        
-        errors = []
-        
-        # Check length difference first
-        if len(original_lines) != len(typed_lines):
-            errors.append({
-                "type": "line_count_mismatch",
-                "message": f"Line count mismatch: {len(original_lines)} vs {len(typed_lines)}"
-            })
-        
-        # Compare line by line
-        for i, (orig, typed) in enumerate(zip(original_lines, typed_lines[:len(original_lines)])):
-            if orig != typed:
-                # Find the position of the first difference
-                pos = next((j for j in range(min(len(orig), len(typed))) if orig[j] != typed[j]), min(len(orig), len(typed)))
-                errors.append({
-                    "type": "content_mismatch",
-                    "line": i + 1,
-                    "position": pos + 1,
-                    "original": orig,
-                    "typed": typed
-                })
-        
-        return {
-            "match": len(errors) == 0,
-            "errors": errors
-        }
+    def append(self, chunk: str):
+        if not chunk:
+            return
+        self._chunks.append(chunk)
+        self.cursor += len(chunk)
+        newlines = chunk.count('\n')
+        if newlines:
+            self.line += newlines
+            self.column = len(chunk) - chunk.rfind('\n') - 1
+        else:
+            self.column += len(chunk)
+    
+    def __len__(self):
+        return self.cursor
+    
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
 
 class RealKeyboardTyper:
     """Class to perform real keyboard typing using pynput with error correction"""
-    def __init__(self, delay=0.01, verify_interval=100):  # Slightly slower for reliability
+    def __init__(self, delay=0.01, verify_interval=100, backend=None, adaptive=False,
+                 burst=None, burst_size=32, jitter=0.01):  # Slightly slower for reliability
         self.keyboard = KeyboardController()
         self.mouse = MouseController()
         self.grammar_checker = GrammarChecker()
         self.delay = delay
         self.verify_interval = verify_interval  # Check every X characters
+        self.jitter = jitter  # Random spread of the delay for realistic typing
+        # Burst mode: None, "word" or "line"; bursts are at most burst_size characters
+        self.burst = burst
+        self.burst_size = burst_size
         self.document_verifier = DocumentVerifier()
-
-    def toggle_bold(self):
+        self.driver = InputDriver(self.keyboard, self.mouse)
+        # Keystrokes are sent from a dedicated thread through the selected
+        # input backend ("pynput", "xtest" or "auto"); see input_backends.py
+        self.keystrokes = KeystrokeThread(select_backend(backend, self.keyboard))
+        self.rate = TypingRate()
+        # Opt-in speed control driven by verification checkpoints. With it,
+        # checkpoints read the editor back through the clipboard, so keys the
+        # editor dropped count as errors and the speed may go past ``delay``
+        self.governor = ThroughputGovernor(delay, verify_interval) if adaptive else None
+        self.clipboard = ClipboardReader(READBACK_TIMEOUT) if adaptive else None
+
+    async def toggle_bold(self):
         """Toggle bold formatting using Ctrl+B shortcut"""
-        with self.keyboard.pressed(Key.ctrl):
-            self.keyboard.press('b')
-            self.keyboard.release('b')
-        time.sleep(0.1)
+        await self.driver.toggle_format(FORMAT_BOLD)
 
-    def toggle_underline(self):
+    async def toggle_underline(self):
         """Toggle underline formatting using Ctrl+U shortcut"""
-        with self.keyboard.pressed(Key.ctrl):
-            self.keyboard.press('u')
-            self.keyboard.release('u')
-        time.sleep(0.1)
+        await self.driver.toggle_format(FORMAT_UNDERLINE)
 
-    def toggle_italic(self):
+    async def toggle_italic(self):
         """Toggle italic formatting using Ctrl+I shortcut"""
-        with self.keyboard.pressed(Key.ctrl):
-            self.keyboard.press('i')
-            self.keyboard.release('i')
-        time.sleep(0.1)
+        await self.driver.toggle_format(FORMAT_ITALIC)
 
-    def click_and_focus(self, position=None):
+    async def click_and_focus(self, position=None):
         """Click at specified coordinates to focus or use current position"""
-        if position:
-            # Save current position
-            old_pos = self.mouse.position
-            # Move to target position
-            self.mouse.position = position
-            time.sleep(0.1)
-            # Click to focus
-            self.mouse.click(Button.left)
-            time.sleep(0.1)
-            # Return to original position to avoid interference
-            self.mouse.position = old_pos
-        else:
-            # Just click at current position
-            self.mouse.click(Button.left)
-            time.sleep(0.1)
+        await self.driver.click(position)
     
-    def select_all_and_delete(self):
+    async def select_all_and_delete(self):
         """Select all text and delete it to start fresh"""
-        with self.keyboard.pressed(Key.ctrl):
-            self.keyboard.press('a')
-            self.keyboard.release('a')
-        time.sleep(0.1)
-        self.keyboard.press(Key.delete)
-        self.keyboard.release(Key.delete)
-        time.sleep(0.1)
-
-    async def type_with_formatting(self, text, focus_position=None):
+        await self.driver.select_all_and_delete()
+
+    async def type_with_formatting(self, text, focus_position=None, progress_callback=None):
         """Type text with formatting support for bold, italic, and underline"""
-        # Initial focus
-        self.click_and_focus(focus_position)
-        
         # Process text with formatting markers
         # For example, you could use markers like **bold**, _italic_, __underline__
-        
-        i = 0
-        while i < len(text):
-            # Check for bold markers
-            if text[i:i+2] == "**" and "**" in text[i+2:]:
-                # Skip the opening marker
-                i += 2
-                # Find the closing marker
-                end_bold = text.find("**", i)
-                if end_bold != -1:
-                    # Get the text to be bolded
-                    bold_text = text[i:end_bold]
-                    # Toggle bold on
-                    self.toggle_bold()
-                    # Type the text
-                    for char in bold_text:
-                        if not self.handle_special_char(char):
-                            self.keyboard.press(char)
-                            self.keyboard.release(char)
-                        await asyncio.sleep(self.delay)
-                    # Toggle bold off
-                    self.toggle_bold()
-                    # Skip to after the closing marker
-                    i = end_bold + 2
-                    continue
-            
-            # Check for underline markers (similar logic)
-            if text[i:i+2] == "__" and "__" in text[i+2:]:
-                # Skip the opening marker
-                i += 2
-                # Find the closing marker
-                end_underline = text.find("__", i)
-                if end_underline != -1:
-                    # Get the text to be underlined
-                    underline_text = text[i:end_underline]
-                    # Toggle underline on
-                    self.toggle_underline()
-                    # Type the text
-                    for char in underline_text:
-                        if not self.handle_special_char(char):
-                            self.keyboard.press(char)
-                            self.keyboard.release(char)
-                        await asyncio.sleep(self.delay)
-                    # Toggle underline off
-                    self.toggle_underline()
-                    # Skip to after the closing marker
-                    i = end_underline + 2
-                    continue
-            
-            # Type regular character
-            if not self.handle_special_char(text[i]):
-                self.keyboard.press(text[i])
-                self.keyboard.release(text[i])
-            
-            # Move to next character
-            i += 1
-            await asyncio.sleep(self.delay)
+        # The markup is tokenized once into plain text and formatting runs,
+        # then every run is typed from one compiled keystroke plan.
+        plain, spans = tokenize_markup(text)
+        await self.type_spans(plain, spans, focus_position, progress_callback)
+    
+    async def type_spans(self, plain, spans, focus_position=None, progress_callback=None):
+        """Type plain text with (start, end, FORMAT_* flags) formatting spans, e.g. from a prepared artifact"""
+        # Initial focus
+        await self.click_and_focus(focus_position)
+        
+        self.rate = TypingRate()
+        plan = self.compile(plain, spans)
+        for first_event, end_event, chars_typed in plan.slices(self.slice_chars):
+            await self.replay_plan(plan, first_event, end_event)
+            if progress_callback:
+                await progress_callback(chars_typed, self.rate.achieved)
+        self.report_rate()
+    
+    @property
+    def slice_chars(self):
+        """Characters replayed between two returns to the event loop"""
+        return max(PROGRESS_INTERVAL, self.burst_size) if self.burst else PROGRESS_INTERVAL
     
-    def handle_special_char(self, char):
-        """Handle typing of special characters"""
-        if char == '\n':
-            self.keyboard.press(Key.enter)
-            self.keyboard.release(Key.enter)
-            return True
-        elif char == '\t':
-            self.keyboard.press(Key.tab)
-            self.keyboard.release(Key.tab)
-            return True
-        elif char == ' ':
-            self.keyboard.press(Key.space)
-            self.keyboard.release(Key.space)
-            return True
-        return False
+    def compile(self, text, spans=None, delay=None, jitter=0.0):
+        """Compile text into a keystroke plan and resolve how each of its characters is typed"""
+        plan = compile_plan(text, spans, self.delay if delay is None else delay, jitter,
+                            self.burst, self.burst_size)
+        self.keystrokes.backend.prepare(text)
+        return plan
     
-    def handle_text_selection(self, count=1, direction="forward"):
+    async def replay_plan(self, plan, start=0, stop=None, scale=1.0):
+        """Replay events ``start:stop`` of a compiled plan on the keystroke thread
+
+        Returns the text offsets of characters that could not be typed and
+        adds the requested and achieved speed of the slice to ``self.rate``.
+        """
+        failed, rate = await self.keystrokes.replay(plan, start, stop, scale)
+        self.rate.add(rate)
+        return failed
+    
+    def close(self):
+        """Stop the keystroke thread and release the input backend and its display connections"""
+        self.keystrokes.stop()
+        if self.clipboard is not None:
+            self.clipboard.close()
+
+    async def read_back(self) -> Optional[str]:
+        """The text of the focused editor, copied with Ctrl+A Ctrl+C; None when nothing was copied
+
+        The caret is put back at the end of the document afterwards.
+        """
+        text = await self.clipboard.capture(self.driver.select_all_and_copy)
+        await self.driver.document_end()
+        return text or None
+
+    async def read_typed(self, before: str, limit: int) -> Optional[str]:
+        """What the editor shows after ``before``, the text it held when typing started
+
+        The editor can drop keys but not add any, so a readback with more
+        than ``limit`` characters after ``before``, or one that does not
+        start with it, holds text that was not typed here and gives None.
+        """
+        screen = await self.read_back()
+        if screen is None or not screen.startswith(before) or len(screen) - len(before) > limit:
+            return None
+        return screen[len(before):]
+    
+    def report_rate(self):
+        """Print the achieved versus requested speed of the last typing run"""
+        print(f"Typed {self.rate.chars} characters at {self.rate.achieved:.0f} chars/s "
+              f"(requested {self.rate.requested:.0f} chars/s)")
+    
+    async def type_plain(self, text, delay=None):
+        """Type plain text through a compiled plan, returning the offsets that failed"""
+        return await self.replay_plan(self.compile(text, delay=delay))
+    
+    async def handle_text_selection(self, count=1, direction="forward"):
         """Handle text selection for correction"""
-        key = Key.right if direction == "forward" else Key.left
-        with self.keyboard.pressed(Key.shift):
-            for _ in range(count):
-                self.keyboard.press(key)
-                self.keyboard.release(key)
-                time.sleep(0.01)
+        await self.driver.select(count, direction)
     
     def preserve_formatting_boundaries(self, text):
         """Ensure proper formatting boundaries are preserved"""
@@ -270,122 +257,164 @@ class RealKeyboardTyper:
         preserved = re.sub(r'([^\n])\n([^\n])', r'\1\n\n\2', preserved)
         return preserved
     
-    async def apply_corrections(self, expected, actual):
-        """Apply corrections to make actual text match expected text"""
-        if expected == actual:
-            return
-        
-        # Calculate differences
-        min_len = min(len(expected), len(actual))
-        
-        # Find the first position where they differ
-        diff_pos = 0
-        for i in range(min_len):
-            if expected[i] != actual[i]:
-                diff_pos = i
-                break
+    async def apply_corrections(self, expected, actual, cursor=None, offset=None):
+        """Apply corrections to make actual text match expected text
+
+        The edits come from a minimal edit script and are applied from the
+        last one backwards, moving the caret relative to where it is
+        (``cursor``, by default the end of ``actual``), so only the wrong
+        characters are touched. The caret ends up back after the text.
+
+        ``offset`` is where ``actual`` starts in a document that ends with
+        it; when given, an edit nearer the start of the document than the
+        caret is reached with Ctrl+Home, and the end with Ctrl+End. Only
+        pass it when the text before the typing position is known, since
+        the editor may already have held text when typing started.
+
+        Returns the text now on screen: ``expected``, unless some of the
+        correcting keystrokes failed to send.
+        """
+        operations = edit_script(expected, actual)
+        if not operations:
+            return actual
+        
+        cursor = len(actual) if cursor is None else cursor
+        # The screen text, built from its end since the edits go backwards
+        pieces = []
+        end = len(actual)
+        for operation in reversed(operations):
+            # Go to the end of the wrong characters, delete them and type the right ones
+            target = operation.position + operation.length
+            if offset is not None and offset + target < cursor - target:
+                await self.driver.document_start()
+                await self.driver.move_cursor(offset + target)
+            else:
+                await self.driver.move_cursor(target - cursor)
+            await self.driver.backspace(operation.length)
+            typed = operation.text
+            if typed:
+                failed = await self.type_plain(typed)
+                if failed:
+                    typed = "".join(char for index, char in enumerate(typed) if index not in failed)
+            pieces.append(actual[operation.position + operation.length:end])
+            pieces.append(typed)
+            end = operation.position
+            cursor = operation.position + len(typed)
+        pieces.append(actual[:end])
+        screen = "".join(reversed(pieces))
+        
+        # Text before the first edit is unchanged, so the end is now len(screen)
+        if offset is not None and cursor < len(screen):
+            await self.driver.document_end()
         else:
-            # If no difference found in common length, the difference is in length
-            diff_pos = min_len
-        
-        # Calculate how many characters to delete and what to type
-        chars_to_delete = len(actual) - diff_pos
-        chars_to_type = expected[diff_pos:]
-        
-        if chars_to_delete > 0:
-            # Select and delete the incorrect characters
-            for _ in range(chars_to_delete):
-                self.keyboard.press(Key.backspace)
-                self.keyboard.release(Key.backspace)
-                await asyncio.sleep(0.01)
-        
-        # Type the correct characters
-        for char in chars_to_type:
-            if not self.handle_special_char(char):
-                self.keyboard.press(char)
-                self.keyboard.release(char)
-            await asyncio.sleep(self.delay)
+            await self.driver.move_cursor(len(screen) - cursor)
+        return screen
             
-    async def type_with_verification(self, text, focus_position=None, error_correction=True,progress_callback=None):
-        """Type text with periodic verification and error correction"""
+    async def type_with_verification(self, text, focus_position=None, error_correction=True,progress_callback=None, spans=None):
+        """Type text with periodic verification and error correction
+
+        ``spans`` are (start, end, FORMAT_* flags) formatting runs over
+        ``text``, e.g. from a prepared artifact; the text is then already
+        normalized and is typed as is. Corrections are typed unformatted.
+        """
         # Initial focus
-        self.click_and_focus(focus_position)
+        await self.click_and_focus(focus_position)
         
         # Ensure proper formatting boundaries
-        text = self.preserve_formatting_boundaries(text)
-        
-        # Variables for cursor tracking
-        cursor_line = 0
-        cursor_pos = 0
-        typed_content = ""
-        
-        # Type character by character with verification
-        char_count = 0
-        segments = text.split('\n')
+        if spans is None:
+            text = self.preserve_formatting_boundaries(text)
+        
+        # What has been typed is mirrored in an append-only buffer; each
+        # checkpoint only looks at the window typed since the previous one
+        mirror = TypedMirror()
+        self.rate = TypingRate()
+        window = []
+        window_length = 0
+        window_failed = 0
+        window_start = 0
+        typed_upto = 0
+        
+        # Every keystroke and its jittered delay is decided before typing starts
+        plan = self.compile(text, spans, jitter=self.jitter)
+        self.document_verifier.begin(text)
+        governor = self.governor if error_correction else None
+        next_check = governor.verify_interval if governor else self.verify_interval
+        # The governor needs what the editor really shows, so its checkpoints
+        # read the editor back; typing has to happen at the end of its text
+        before = None
+        if governor:
+            before = await self.read_back() or ""
+        
+        for first_event, end_event, char_count in plan.slices(self.slice_chars):
+            failed = await self.replay_plan(plan, first_event, end_event, governor.scale if governor else 1.0)
+            chunk = text[typed_upto:char_count]
+            if failed:
+                chunk = "".join(char for index, char in enumerate(chunk, typed_upto) if index not in failed)
+                window_failed += len(failed)
+            window.append(chunk)
+            window_length += len(chunk)
+            typed_upto = char_count
+            
+            # Update progress
+            if progress_callback:
+                await progress_callback(len(mirror) + window_length, self.rate.achieved)
+            
+            # Verify every X characters if enabled
+            if not error_correction or char_count < next_check or char_count == len(text):
+                continue
+            
+            expected_window = text[window_start:char_count]
+            typed_window = "".join(window)
+            offset = None
+            if governor:
+                shown = await self.read_typed(before, len(mirror) + window_length)
+                if shown is not None and shown.startswith(mirror.text):
+                    typed_window = shown[len(mirror):]
+                    offset = len(before) + len(mirror)
+            # Only the lines this window touched are compared
+            comparison = self.document_verifier.checkpoint(window_start, typed_window, char_count)
+            if not comparison["match"]:
+                typed_window = await self.verify_and_correct(expected_window, typed_window, mirror.line, mirror.column, comparison, offset)
+                # Only a correction that fully landed puts the expected window on screen
+                if typed_window == expected_window:
+                    self.document_verifier.confirm(window_start, expected_window)
+            mirror.append(typed_window)
+            
+            # Speed up after a clean window, back off after one with errors
+            if governor:
+                governor.record(window_failed + len(comparison["errors"]), self.rate)
+            next_check = char_count + (governor.verify_interval if governor else self.verify_interval)
+            window = []
+            window_length = 0
+            window_failed = 0
+            window_start = char_count
+            
+            # Check grammar in the last sentence of the window
+            last_sentence = re.split(r'[.!?]', expected_window)[-1]
+            if len(last_sentence) > 10:  # Only check substantial sentences
+                corrections = self.grammar_checker.check_grammar(last_sentence)
+                if corrections:
+                    print(f"Grammar correction suggested: {corrections[0]['message']}")
         
-        for i, segment in enumerate(segments):
-            # Type each character in the segment
-            for j, char in enumerate(segment):
-                # Update cursor position tracking
-                cursor_pos = j
-                
-                # Regular typing with error handling
-                try:
-                    # Type the character
-                    self.keyboard.press(char)
-                    self.keyboard.release(char)
-                    typed_content += char
-                except Exception as e:
-                    print(f"Error typing character '{char}': {str(e)}")
-                    # Try alternative method for problematic characters
-                    try:
-                        keyboard.write(char)
-                        typed_content += char
-                    except:
-                        print(f"Failed to type character '{char}'")
-                
-                # Update progress
-                char_count += 1
-                if progress_callback and char_count % 5 == 0:  # Update every 5 characters to avoid too frequent updates
-                    await progress_callback(char_count)
-                
-                # Dynamic delay between keystrokes for realistic typing
-                typing_delay = self.delay + (0.01 * (0.5 - random.random()))
-                await asyncio.sleep(typing_delay)
-                
-                # Verify every X characters if enabled
-                char_count += 1
-                if error_correction and char_count % self.verify_interval == 0:
-                    await self.verify_and_correct(text[:len(typed_content)], typed_content, cursor_line, cursor_pos)
-
-                if error_correction and char_count % self.verify_interval == 0:
-                    expected_so_far = text[:len(typed_content)]
-                    await self.apply_corrections(expected_so_far, typed_content)
-                    
-                    # Check grammar in the last sentence
-                    last_sentence = re.split(r'[.!?]', typed_content)[-1]
-                    if len(last_sentence) > 10:  # Only check substantial sentences
-                        corrections = self.grammar_checker.check_grammar(last_sentence)
-                        if corrections:
-                            print(f"Grammar correction suggested: {corrections[0]['message']}")
-                            
-                    
-            # Add newline if not the last segment
-            if i < len(segments) - 1:
-                self.keyboard.press(Key.enter)
-                self.keyboard.release(Key.enter)
-                typed_content += '\n'
-                cursor_line += 1
-                cursor_pos = 0
-                await asyncio.sleep(self.delay)
+        mirror.append("".join(window))
         
-        # Final verification
+        # Final verification: the whole document, skipping the prefix already confirmed
+        typed_content = mirror.text
         if error_correction:
-            await self.verify_and_correct(text, typed_content, cursor_line, cursor_pos)
+            offset = None
+            if governor:
+                shown = await self.read_typed(before, len(typed_content))
+                if shown is not None:
+                    typed_content = shown
+                    offset = len(before)
+            comparison = self.document_verifier.verify_document(typed_content)
+            if not comparison["match"]:
+                typed_content = await self.verify_and_correct(text, typed_content, mirror.line, mirror.column, comparison, offset)
         
         if progress_callback:
-            await progress_callback(len(typed_content))
+            await progress_callback(len(typed_content), self.rate.achieved)
         
+        self.report_rate()
         return typed_content
     
     def preserve_formatting_boundaries(self, text):
@@ -396,72 +425,35 @@ class RealKeyboardTyper:
         preserved = re.sub(r'([^\n])\n([^\n])', r'\1\n\n\2', preserved)
         return preserved
     
-    async def verify_and_correct(self, expected, actual, current_line, current_pos):
-        """Verify typed content and attempt to correct errors"""
-        # Save original cursor position
-        original_line = current_line
-        original_pos = current_pos
-        
+    async def verify_and_correct(self, expected, actual, current_line, current_pos, comparison=None, offset=None):
+        """Verify typed content and attempt to correct errors
+
+        ``comparison`` is a result already computed by the document verifier;
+        without one the two texts are compared here. ``offset`` is passed on
+        to ``apply_corrections``. Returns the text on screen afterwards.
+        """
         # Skip verification if strings match exactly
         if expected == actual:
-            return
-        
-        # Simple check for line count discrepancy
-        expected_lines = expected.count('\n') + 1
-        actual_lines = actual.count('\n') + 1
-        
-        if expected_lines != actual_lines:
-            print(f"Warning: Line count mismatch - expected {expected_lines}, got {actual_lines}")
-            
-            # Try to correct by moving to the end and adding needed newlines
-            for _ in range(abs(expected_lines - actual_lines)):
-                self.keyboard.press(Key.enter)
-                self.keyboard.release(Key.enter)
-                await asyncio.sleep(0.05)
+            return actual
         
         # Look for character mismatches and try to correct them
-        comparison = self.document_verifier.compare_content(expected, actual)
+        if comparison is None:
+            comparison = self.document_verifier.compare_content(expected, actual)
         
         if not comparison["match"] and len(comparison["errors"]) > 0:
             print(f"Detected {len(comparison['errors'])} errors, attempting to correct...")
             
-            # We'll implement a simple correction for the first error
-            if len(comparison["errors"]) > 0:
-                err = comparison["errors"][0]
-                if err["type"] == "content_mismatch":
-                    # Try to navigate to the error position
-                    # This is a simplified approach - more sophisticated navigation would be needed
-                    # for real-world applications
-                    
-                    # First press Escape to ensure we're not in any special mode
-                    self.keyboard.press(Key.esc)
-                    self.keyboard.release(Key.esc)
-                    await asyncio.sleep(0.1)
-                    
-                    # Try to correct by retyping the problematic part
-                    print(f"Attempting recovery...")
-                    self.click_and_focus()
-                    await asyncio.sleep(0.1)
-                    
-                    # Select all and delete as a recovery method
-                    self.select_all_and_delete()
-                    
-                    # Retype from the beginning of the problematic section
-                    # For simplicity, we'll just retype a portion of the text
-                    recovery_text = expected[:min(len(expected), 200)]  # Just first 200 chars for demo
-                    for recovery_char in recovery_text:
-                        if not self.handle_special_char(recovery_char):
-                            self.keyboard.press(recovery_char)
-                            self.keyboard.release(recovery_char)
-                        await asyncio.sleep(self.delay)
+            # Fix only the characters that differ, from where the caret is
+            return await self.apply_corrections(expected, actual, offset=offset)
+        return actual
 
     async def type_text(self, text, focus_position=None):
         """Type the text using real keyboard inputs with proper focus management"""
         # Initial focus
         if focus_position:
-            self.click_and_focus(focus_position)
+            await self.click_and_focus(focus_position)
         else:
-            self.click_and_focus()
+            await self.click_and_focus()
         
         # Set up a mouse position check interval to maintain focus
         last_check = time.time()
@@ -470,13 +462,14 @@ class RealKeyboardTyper:
         # Remember initial position to check if mouse moved
         initial_pos = self.mouse.position
         
-        # Keep track of what we've typed for verification
-        typed_text = ""
-        
-        # Split text by paragraphs to handle formatting better
+        # Split text by paragraphs to handle formatting better, then
+        # compile them with their paragraph breaks into a single plan
         paragraphs = re.split(r'\n\s*\n', text)
+        typed_text = "\n\n".join(paragraphs)
+        plan = self.compile(typed_text, jitter=self.jitter)
+        self.rate = TypingRate()
         
-        for i, paragraph in enumerate(paragraphs):
+        for first_event, end_event, _ in plan.slices(self.slice_chars):
             # Check if we need to refocus
             current_time = time.time()
             if current_time - last_check > check_interval:
@@ -488,36 +481,14 @@ class RealKeyboardTyper:
                 if distance > 5:  # Mouse moved more than 5 pixels
                     # Refocus by clicking
                     print("Mouse moved - refocusing...")
-                    self.click_and_focus(initial_pos)
+                    await self.click_and_focus(initial_pos)
                     initial_pos = self.mouse.position  # Update initial position
                 
                 last_check = current_time
             
-            # Type each character in the paragraph
-            for char in paragraph:
-                # Handle special characters
-                if not self.handle_special_char(char):
-                    # Type the character
-                    self.keyboard.press(char)
-                    self.keyboard.release(char)
-                
-                typed_text += char
-                
-                # Dynamic delay between keystrokes for realistic typing
-                typing_delay = self.delay + (0.01 * (0.5 - random.random()))
-                await asyncio.sleep(typing_delay)
-            
-            # Add paragraph breaks between paragraphs, except after the last one
-            if i < len(paragraphs) - 1:
-                # Add two newlines for paragraph breaks
-                self.keyboard.press(Key.enter)
-                self.keyboard.release(Key.enter)
-                await asyncio.sleep(self.delay)
-                self.keyboard.press(Key.enter)
-                self.keyboard.release(Key.enter)
-                await asyncio.sleep(self.delay)
-                typed_text += "\n\n"
+            await self.replay_plan(plan, first_event, end_event)
         
+        self.report_rate()
         return typed_text
 
 task_desp = (
@@ -583,9 +554,9 @@ By following these directives without deviation, you will ensure perfect reprodu
 
 class DocumentRetyper:
     """Class to retype documents with real keyboard typing"""
-    def __init__(self, delay=0.01):
+    def __init__(self, delay=0.01, burst=None, adaptive=False):
         self.document_retyper = None
-        self.keyboard_typer = RealKeyboardTyper(delay=delay)  # Use the configurable delay
+        self.keyboard_typer = RealKeyboardTyper(delay=delay, burst=burst, adaptive=adaptive)  # Use the configurable delay
         
     async def async_init(self):
         """Async initialization method"""
@@ -597,6 +568,10 @@ class DocumentRetyper:
         )
         return self
 
+    def close(self):
+        """Release the keyboard typer; call once the retyper is no longer needed"""
+        self.keyboard_typer.close()
+
     async def retype_document_with_real_typing(self, document_text: str, typing_position=None, error_correction=True, progress_callback=None):
         """Function to retype a document using real keyboard inputs with formatting support"""
         content = DocumentContent(text=document_text)
@@ -613,13 +588,14 @@ class DocumentRetyper:
         # Perform real keyboard typing with formatting support
         try:
             typed_chars = 0
+            complete = True
         
         # Function to track progress during typing
-            async def progress_tracker(chars_typed):
+            async def progress_tracker(chars_typed, chars_per_second=0.0):
                 nonlocal typed_chars
                 typed_chars = chars_typed
                 if progress_callback:
-                    await progress_callback(typed_chars)
+                    await progress_callback(typed_chars, chars_per_second)
         
             # Check if the content likely has formatting markers
             if "**" in result.data.content or "__" in result.data.content or "_" in result.data.content:
@@ -627,69 +603,54 @@ class DocumentRetyper:
                 await self.keyboard_typer.type_with_formatting(result.data.content, typing_position,progress_tracker)
             else:
                 # Use the regular typing with verification method
-                await self.keyboard_typer.type_with_verification(result.data.content, typing_position, error_correction, progress_tracker)
-            print(f"\nDocument successfully retyped using real keyboard inputs!")
+                typed = await self.keyboard_typer.type_with_verification(result.data.content, typing_position, error_correction, progress_tracker)
+                complete = typed == self.keyboard_typer.preserve_formatting_boundaries(result.data.content)
+            if complete:
+                print(f"\nDocument successfully retyped using real keyboard inputs!")
+            else:
+                print(f"\nDocument retyped, but some keystrokes were lost and could not be corrected")
         except Exception as e:
             print(f"Error during typing: {str(e)}")
             traceback.print_exc()
         
         return result.data.content
 
-    async def display_document_info(self, file_path: str):
+    async def retype_prepared(self, artifact: TypingArtifact, typing_position=None, error_correction=True, progress_callback=None):
+        """Type a document prepared by batch_prepare.py from its stored text and formatting spans
+
+        The text was extracted and normalized ahead of time, so nothing is
+        parsed or sent to the agent before typing starts.
+        """
+        print(f"Typing prepared document {artifact.source}...")
+        try:
+            complete = True
+            if error_correction:
+                typed = await self.keyboard_typer.type_with_verification(
+                    artifact.text, typing_position, error_correction, progress_callback, spans=artifact.spans
+                )
+                complete = typed == artifact.text
+            else:
+                await self.keyboard_typer.type_spans(artifact.text, artifact.spans, typing_position, progress_callback)
+            if complete:
+                print(f"\nDocument successfully retyped using real keyboard inputs!")
+            else:
+                print(f"\nDocument retyped, but some keystrokes were lost and could not be corrected")
+        except Exception as e:
+            print(f"Error during typing: {str(e)}")
+            traceback.print_exc()
+        return artifact.text
+
+    async def display_document_info(self, document) -> DocumentStats:
         """Display basic document info without typing the content"""
-        # Check if it's a docx file
-        if file_path.endswith('.docx'):
-            import docx
-            doc = docx.Document(file_path)
-            # Count paragraphs and characters in docx
-            paragraphs = len(doc.paragraphs)
-            char_count = sum(len(paragraph.text) for paragraph in doc.paragraphs)
-            
-            print(f"Document loaded: {file_path}")
-            print(f"Document contains {paragraphs} paragraphs and {char_count} characters.")
-            print("Starting retyping process...\n")
-            return f"Document contains {paragraphs} paragraphs and {char_count} characters."
-        else:
-            # For regular text files
-            with open(file_path, 'r') as f:
-                content = f.read()
-                
-            print(f"Document loaded: {file_path}")
-            line_count = content.count('\n') + 1
-            char_count = len(content)
-            print(f"Document contains {line_count} lines and {char_count} characters.")
-            print("Starting retyping process...\n")
-            return f"Document contains {line_count} lines and {char_count} characters."
+        if not isinstance(document, ParsedDocument):
+            document = load_document(document)
+        
+        print(f"Document loaded: {document.name}")
+        print(document.stats.summary)
+        print("Starting retyping process...\n")
+        return document.stats
 
 # Function to extract text from docx with better formatting preservation
 def extract_text_from_docx(docx_path):
     """Extract text from docx file with enhanced formatting preservation"""
-    import docx
-    doc = docx.Document(docx_path)
-    full_text = []
-    
-    # Process paragraphs with enhanced formatting
-    for para in doc.paragraphs:
-        # Don't skip empty paragraphs - they're part of formatting
-        # Handle heading styles
-        if para.style.name.startswith('Heading'):
-            # Add appropriate formatting based on heading level
-            level = int(para.style.name.replace('Heading', '')) if para.style.name != 'Heading' else 1
-            prefix = '#' * level + ' ' if level > 0 else ''
-            full_text.append(f"{prefix}{para.text}")
-        else:
-            # Regular paragraph - include even if empty to preserve spacing
-            full_text.append(para.text)
-    
-    # Process tables if any
-    for table in doc.tables:
-        table_rows = []
-        for row in table.rows:
-            row_text = []
-            for cell in row.cells:
-                row_text.append(cell.text.strip())
-            table_rows.append(" | ".join(row_text))
-        full_text.append("\n".join(table_rows))
-    
-    # Join with paragraph spacing preserved
-    return "\n\n".join(full_text)
\ No newline at end of file
+    return load_document(docx_path).text
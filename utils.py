@@ -1,13 +1,10 @@
-import mimetypes
 import logging
 from pathlib import Path
 from typing import List
-import chardet
-import docx
 
 import streamlit as st
 from pynput.mouse import Button, Controller as MouseController
-import io
+from document_parser import SUPPORTED_TYPES, file_type, parse_uploaded_file
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,41 +14,33 @@ logger = logging.getLogger(__name__)
 def is_valid_doc(file):
     """Validate if file is a proper document type with valid content"""
     try:
-        file_extension = file.name.split('.')[-1].lower()
-        mime_type = mimetypes.guess_type(file.name)[0]
+        file_extension = file_type(file.name)
         
         
         file_size = len(file.getvalue())
         if file_size > 10 * 1024 * 1024:  # 10MB
             return False, "File too large (max 10MB)"
         
-        
-        if file_extension == 'docx':
-            try:
-                doc = docx.Document(io.BytesIO(file.getvalue()))
-                
-                has_content = any(len(para.text.strip()) > 0 for para in doc.paragraphs)
-                if not has_content:
-                    return False, "DOCX file appears to be empty"
-                return True, {"type": "docx", "mime": mime_type, "size": file_size}
-            except Exception as e:
-                return False, f"Invalid DOCX file: {str(e)}"
-                
-        elif file_extension in ['txt', 'py', 'md', 'pdf']:
-            try:
-                
-                raw_data = file.getvalue()
-                detected = chardet.detect(raw_data)
-                encoding = detected['encoding'] if detected['encoding'] else 'utf-8'
-                
-                content = raw_data.decode(encoding)
-                if not content.strip():
-                    return False, "File appears to be empty"
-                return True, {"type": file_extension, "mime": mime_type, "size": file_size, "encoding": encoding}
-            except Exception as e:
-                return False, f"Error reading file: {str(e)}"
-        else:
+        if file_extension not in SUPPORTED_TYPES:
             return False, f"Unsupported file type: {file_extension}"
+        
+        try:
+            document = parse_uploaded_file(file)
+        except Exception as e:
+            if file_extension in ('docx', 'odt', 'pdf'):
+                return False, f"Invalid {file_extension.upper()} file: {str(e)}"
+            return False, f"Error reading file: {str(e)}"
+        
+        if file_extension in ('docx', 'odt'):
+            has_content = any(len(para.text.strip()) > 0 for para in document.paragraphs)
+            if not has_content:
+                return False, f"{file_extension.upper()} file appears to be empty"
+            return True, {"type": file_extension, "mime": document.mime, "size": file_size, "document": document}
+        
+        if not document.text.strip():
+            return False, "File appears to be empty"
+        return True, {"type": file_extension, "mime": document.mime, "size": file_size,
+                      "encoding": document.encoding, "document": document}
             
     except Exception as e:
         logger.error(f"Validation error: {str(e)}")
@@ -122,16 +111,8 @@ def display_screenshots(screenshots):
 def extract_file_content(file, file_info):
     """Extract text content from various file types"""
     try:
-        if file_info["type"] == "docx":
-            doc = docx.Document(io.BytesIO(file.getvalue()))
-            return "\n".join([para.text for para in doc.paragraphs])
-        else:  # txt, py, md
-            encoding = file_info.get("encoding", "utf-8")
-            try:
-                return file.getvalue().decode(encoding)
-            except UnicodeDecodeError:
-                # Fallback to latin-1 if detected encoding fails
-                return file.getvalue().decode('latin-1', errors='replace')
+        document = file_info.get("document") or parse_uploaded_file(file)
+        return document.plain_text
     except Exception as e:
         logger.error(f"Content extraction error: {str(e)}")
         raise Exception(f"Failed to extract content: {str(e)}")